@@ -0,0 +1,117 @@
+"""
+Throughput of CPU-bound jobs for different splits of the host's cores among
+worker processes.
+
+Each job is a batch of float32 matrix multiplications (torch if installed,
+numpy otherwise), standing in for a Whisper/BART forward pass. Workers start
+`--stagger` seconds apart, as queue workers pick up work at different times.
+For every worker count the suite runs the jobs three times:
+
+- budgeted: each worker's pools fixed to its share of the cores
+  (resources.plan_thread_budget)
+- rebalanced: each worker holds a resources.HostBudget for its whole run,
+  starting with the cores left by the workers already busy and resizing its
+  pools at a checkpoint between jobs as later ones start, the way a long
+  transcription does between spans (resizing needs torch; numpy's pools are
+  fixed at import)
+- default: the libraries' default pools, one thread per core in every worker
+
+    python benchmarks/bench_thread_budget.py [--jobs 48] [--size 512] [--workers 1,2,4,8] [--stagger 0.5]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.stream_processor.resources import HostBudget, apply_thread_budget, available_cores, plan_thread_budget  # noqa: E402
+
+
+def _job_runner(threads, remaining, size, repeats, delay, budget_path):
+    time.sleep(delay)
+    host_budget = None
+    if budget_path:
+        host_budget = HostBudget(budget_path, rebalance_interval=0.2)
+        host_budget.acquire()
+    elif threads:
+        # Must run before torch/numpy create their thread pools
+        apply_thread_budget(threads)
+    try:
+        import torch
+        a = torch.rand(size, size)
+        b = torch.rand(size, size)
+        matmul = torch.matmul
+    except ImportError:
+        import numpy as np
+        a = np.random.rand(size, size).astype(np.float32)
+        b = np.random.rand(size, size).astype(np.float32)
+        matmul = np.matmul
+
+    try:
+        while True:
+            with remaining.get_lock():
+                if remaining.value <= 0:
+                    return
+                remaining.value -= 1
+            if host_budget:
+                host_budget.checkpoint()
+            for _ in range(repeats):
+                matmul(a, b)
+    finally:
+        if host_budget:
+            host_budget.close()
+
+
+def run(workers, mode, jobs, size, repeats, stagger):
+    context = multiprocessing.get_context("spawn")
+    remaining = context.Value("i", jobs)
+    budget = plan_thread_budget(workers) if mode == "budgeted" else [None] * workers
+    budget_dir = tempfile.TemporaryDirectory()
+    budget_path = Path(budget_dir.name) / "threads.db" if mode == "rebalanced" else None
+    processes = [
+        context.Process(target=_job_runner, args=(threads, remaining, size, repeats, i * stagger, budget_path))
+        for i, threads in enumerate(budget)
+    ]
+
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    budget_dir.cleanup()
+    return jobs / elapsed
+
+
+def main():
+    cores = len(available_cores())
+    default_workers = sorted({1, 2, max(1, cores // 2), cores})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=48, help="Jobs per run (default: 48)")
+    parser.add_argument("--size", type=int, default=512, help="Matrix size (default: 512)")
+    parser.add_argument("--repeats", type=int, default=20, help="Multiplications per job (default: 20)")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help=f"Comma-separated worker counts (default: {','.join(map(str, default_workers))})")
+    parser.add_argument("--stagger", type=float, default=0.5, help="Seconds between worker starts (default: 0.5)")
+    args = parser.parse_args()
+
+    # The unbudgeted runs must see the libraries' defaults
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS"):
+        os.environ.pop(name, None)
+
+    print(f"{cores} cores, {args.jobs} jobs of {args.repeats} x {args.size}x{args.size} matmul")
+    print(f"{'workers':>7}  {'threads/worker':>14}  {'budgeted jobs/s':>15}  {'rebalanced jobs/s':>17}  {'default jobs/s':>14}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        threads = plan_thread_budget(workers, cores)
+        rates = [run(workers, mode, args.jobs, args.size, args.repeats, args.stagger)
+                 for mode in ("budgeted", "rebalanced", "default")]
+        split = "/".join(map(str, sorted(set(threads), reverse=True)))
+        print(f"{workers:>7}  {split:>14}  {rates[0]:>15.2f}  {rates[1]:>17.2f}  {rates[2]:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
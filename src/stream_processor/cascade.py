@@ -0,0 +1,124 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+# Whisper decoding options per profile, passed through to model.transcribe().
+# "fast" decodes greedily at temperature 0 with no temperature fallback.
+DECODE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {"temperature": 0.0, "beam_size": None, "best_of": None, "condition_on_previous_text": False},
+    "default": {},
+    "accurate": {"beam_size": 5, "best_of": 5},
+}
+
+# Same quality thresholds Whisper uses to trigger its own temperature fallback
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+NO_SPEECH_THRESHOLD = 0.6
+
+# Failing segments closer than this are re-decoded as one span, and each span
+# is padded on both sides so the larger model gets some context.
+MERGE_GAP_SECONDS = 1.0
+PADDING_SECONDS = 0.5
+
+# Whisper pads every transcribe() call to whole 30 s windows, so spans are
+# packed into windows of that length; once the packed windows would cost this
+# share of a full pass, the whole audio is re-decoded in one pass instead.
+WINDOW_SECONDS = 30.0
+FULL_PASS_RATIO = 0.5
+
+
+def needs_redecode(segment: Dict[str, Any]) -> bool:
+    """
+    Decide whether a segment from the fast model should be re-decoded.
+
+    Segments without decoding statistics (e.g. reused from the fingerprint
+    index) are trusted as they are.
+    """
+    avg_logprob = segment.get('avg_logprob', 0.0)
+    compression_ratio = segment.get('compression_ratio', 1.0)
+    no_speech_prob = segment.get('no_speech_prob', 0.0)
+
+    # Low confidence on what is most likely silence is not worth a second pass
+    if no_speech_prob > NO_SPEECH_THRESHOLD and avg_logprob < LOGPROB_THRESHOLD:
+        return False
+    return avg_logprob < LOGPROB_THRESHOLD or compression_ratio > COMPRESSION_RATIO_THRESHOLD
+
+
+def low_confidence_spans(segments: List[Dict[str, Any]], duration: float) -> List[Tuple[float, float]]:
+    """
+    Return the (start, end) time spans covering segments that need re-decoding.
+    """
+    spans: List[Tuple[float, float]] = []
+    for segment in segments:
+        if not needs_redecode(segment):
+            continue
+        start = max(0.0, segment['start'] - PADDING_SECONDS)
+        end = min(duration, segment['end'] + PADDING_SECONDS)
+        if spans and start - spans[-1][1] <= MERGE_GAP_SECONDS:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def _windows_cost(spans: List[Tuple[float, float]]) -> int:
+    return sum(max(1, math.ceil((end - start) / WINDOW_SECONDS)) for start, end in spans)
+
+
+def redecode_windows(spans: List[Tuple[float, float]], regions: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """
+    Group low-confidence spans into the time windows to re-decode.
+
+    `regions` are the stretches the first pass transcribed (the whole audio,
+    or the gaps a fingerprint match left); windows never leave them.
+    Neighbouring spans are packed together while they fit in one 30 s
+    window, since decoding a short span costs as much as a full window. If
+    the packed windows would cost at least FULL_PASS_RATIO of re-decoding the
+    regions in full, the regions themselves are returned.
+    """
+    windows: List[Tuple[float, float]] = []
+    for region_start, region_end in regions:
+        region_windows: List[Tuple[float, float]] = []
+        for start, end in spans:
+            start, end = max(start, region_start), min(end, region_end)
+            if end <= start:
+                continue
+            if region_windows and end - region_windows[-1][0] <= WINDOW_SECONDS:
+                region_windows[-1] = (region_windows[-1][0], end)
+            else:
+                region_windows.append((start, end))
+        windows.extend(region_windows)
+    if windows and _windows_cost(windows) >= FULL_PASS_RATIO * _windows_cost(regions):
+        return list(regions)
+    return windows
+
+
+def drop_covered(segments: List[Dict[str, Any]], covered: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop segments whose midpoint falls inside any of the `covered` segments.
+    """
+    def midpoint(segment):
+        return (segment['start'] + segment['end']) / 2
+
+    return [s for s in segments if not any(c['start'] <= midpoint(s) < c['end'] for c in covered)]
+
+
+def merge_segments(segments: List[Dict[str, Any]], redecoded: List[Tuple[Tuple[float, float], List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Replace the segments inside each re-decoded span with the larger model's output.
+
+    A first-pass segment is replaced when its midpoint falls inside a span;
+    the re-decoded segments are kept only if their midpoint does as well, so
+    the padding around a span does not duplicate neighbouring text.
+    """
+    def midpoint(segment):
+        return (segment['start'] + segment['end']) / 2
+
+    def inside(segment, span):
+        return span[0] <= midpoint(segment) < span[1]
+
+    spans = [span for span, _ in redecoded]
+    merged = [s for s in segments if not any(inside(s, span) for span in spans)]
+    for span, span_segments in redecoded:
+        merged.extend(s for s in span_segments if inside(s, span))
+    merged.sort(key=lambda segment: segment['start'])
+    return merged
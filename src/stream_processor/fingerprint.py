@@ -0,0 +1,281 @@
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Audio is fingerprinted at the rate Whisper decodes to, so the decoded array
+# can be shared between fingerprinting and transcription.
+SAMPLE_RATE = 16000
+N_FFT = 1024
+HOP_LENGTH = 512
+FRAME_SECONDS = HOP_LENGTH / SAMPLE_RATE
+BLOCK_FRAMES = 4096
+
+# Frequency bands (in FFT bins) that each contribute at most one peak per frame
+BANDS = (1, 10, 20, 40, 80, 160, N_FFT // 2 + 1)
+SILENCE_FLOOR = 1e-2
+# A band peak is kept only if it is the strongest in its band within this many
+# frames either side, and at most MAX_PEAKS_PER_SECOND of the strongest peaks
+# are kept per second of audio.
+PEAK_NEIGHBOURHOOD = 10
+MAX_PEAKS_PER_SECOND = 12
+
+# Landmark pairing: each peak is paired with the following peaks up to
+# FAN_OUT positions ahead and at most MAX_DELTA frames later.
+FAN_OUT = 4
+MAX_DELTA = 63
+
+# Match thresholds
+MIN_VOTES = 10
+MIN_MATCH_RATIO = 0.05
+MIN_OVERLAP_SECONDS = 10.0
+DUPLICATE_COVERAGE = 0.95
+SEGMENT_TOLERANCE = 0.5
+EDGE_SLACK_SECONDS = 3.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    duration REAL NOT NULL,
+    segments TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    recording_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hashes_hash ON hashes (hash);
+"""
+
+
+def _spectrogram_peaks(audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pick sparse spectral peaks: local maxima in time within each frequency
+    band, thinned to the strongest few per second.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) < N_FFT:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    window = np.hanning(N_FFT).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(audio, N_FFT)[::HOP_LENGTH]
+
+    # Strongest bin of every band for every frame; values below the frame's
+    # mean level are zeroed so they never become peaks
+    band_values = np.zeros((len(frames), len(BANDS) - 1), dtype=np.float32)
+    band_bins = np.zeros((len(frames), len(BANDS) - 1), dtype=np.int64)
+    # Work in blocks so long recordings never materialise the full spectrogram
+    for block_start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[block_start:block_start + BLOCK_FRAMES]
+        spectrum = np.log1p(np.abs(np.fft.rfft(block * window, axis=1)))
+        frame_mean = spectrum.mean(axis=1)
+        rows = np.arange(len(spectrum))
+        for band, (low, high) in enumerate(zip(BANDS[:-1], BANDS[1:])):
+            bins = spectrum[:, low:high].argmax(axis=1)
+            values = spectrum[rows, low + bins]
+            keep = (values > frame_mean) & (values > SILENCE_FLOOR)
+            band_values[block_start:block_start + len(block), band] = np.where(keep, values, 0.0)
+            band_bins[block_start:block_start + len(block), band] = bins + low
+
+    padded = np.pad(band_values, ((PEAK_NEIGHBOURHOOD, PEAK_NEIGHBOURHOOD), (0, 0)))
+    local_max = np.lib.stride_tricks.sliding_window_view(padded, 2 * PEAK_NEIGHBOURHOOD + 1, axis=0).max(axis=-1)
+    peak_frames, peak_bands = np.nonzero((band_values > 0) & (band_values >= local_max))
+    peak_values = band_values[peak_frames, peak_bands]
+
+    # Density cap: rank peaks by strength within each second
+    seconds = (peak_frames * FRAME_SECONDS).astype(np.int64)
+    order = np.lexsort((-peak_values, seconds))
+    seconds = seconds[order]
+    first_of_second = np.searchsorted(seconds, seconds, side="left")
+    rank = np.arange(len(order)) - first_of_second
+    order = order[rank < MAX_PEAKS_PER_SECOND]
+
+    peak_frames = peak_frames[order]
+    peak_bins = band_bins[peak_frames, peak_bands[order]]
+    order = np.lexsort((peak_bins, peak_frames))
+    return peak_frames[order].astype(np.int64), peak_bins[order]
+
+
+def compute_fingerprint(audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute landmark hashes for 16 kHz mono audio.
+
+    Returns the hashes and the frame offset of each hash's anchor peak.
+    """
+    peak_frames, peak_bins = _spectrogram_peaks(audio)
+
+    hashes = []
+    offsets = []
+    for step in range(1, FAN_OUT + 1):
+        if step >= len(peak_frames):
+            break
+        delta = peak_frames[step:] - peak_frames[:-step]
+        mask = (delta > 0) & (delta <= MAX_DELTA)
+        anchor_bins = peak_bins[:-step][mask]
+        target_bins = peak_bins[step:][mask]
+        hashes.append((anchor_bins << 16) | (target_bins << 6) | delta[mask])
+        offsets.append(peak_frames[:-step][mask])
+
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(offsets)
+
+
+class FingerprintIndex:
+    """
+    SQLite-backed index of audio fingerprints and the transcripts produced for them.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, source: str, hashes: np.ndarray, offsets: np.ndarray,
+            duration: float, segments: List[Dict[str, Any]]) -> int:
+        """
+        Store a recording's fingerprint together with its transcript segments.
+        """
+        stored_segments = [
+            {'start': float(s['start']), 'end': float(s['end']), 'text': s['text']}
+            for s in segments
+        ]
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO recordings (source, duration, segments, created_at) VALUES (?, ?, ?, ?)",
+                (source, duration, json.dumps(stored_segments, ensure_ascii=False), datetime.now().isoformat()),
+            )
+            recording_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO hashes (hash, recording_id, offset) VALUES (?, ?, ?)",
+                ((int(h), recording_id, int(o)) for h, o in zip(hashes, offsets)),
+            )
+        return recording_id
+
+    def _load_query(self, hashes: np.ndarray, offsets: np.ndarray):
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER NOT NULL, offset INTEGER NOT NULL)")
+        self.conn.execute("DELETE FROM query")
+        self.conn.executemany(
+            "INSERT INTO query (hash, offset) VALUES (?, ?)",
+            ((int(h), int(o)) for h, o in zip(hashes, offsets)),
+        )
+
+    def lookup(self, hashes: np.ndarray, offsets: np.ndarray, duration: float) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored recording that overlaps the query audio.
+
+        Returns None when nothing matches well enough. Otherwise the match kind is
+        'duplicate' when the stored recording covers the whole query, or 'partial'
+        when only a stretch of it does. 'start' and 'end' bound the overlap, and
+        'segments' holds the stored transcript segments lying inside it, shifted
+        to the query's timeline; see uncovered_spans() for what is left to transcribe.
+        """
+        if len(hashes) == 0:
+            return None
+
+        with self.conn:
+            self._load_query(hashes, offsets)
+            # Vote on (recording, time shift) pairs in SQL; a true match lines
+            # up many hashes at the same shift while chance collisions scatter
+            # into groups of one.
+            votes = {
+                (recording_id, delta): count
+                for recording_id, delta, count in self.conn.execute(
+                    "SELECT h.recording_id, h.offset - q.offset AS delta, COUNT(*) FROM query q "
+                    "JOIN hashes h ON h.hash = q.hash GROUP BY h.recording_id, delta HAVING COUNT(*) > 1"
+                )
+            }
+            if not votes:
+                return None
+
+            def score(key):
+                recording_id, delta = key
+                return votes[key] + votes.get((recording_id, delta - 1), 0) + votes.get((recording_id, delta + 1), 0)
+
+            recording_id, delta = max(votes, key=score)
+            best_score = score((recording_id, delta))
+            if best_score < MIN_VOTES:
+                return None
+
+            matched = [
+                query_offset for (query_offset,) in self.conn.execute(
+                    "SELECT q.offset FROM query q JOIN hashes h ON h.hash = q.hash "
+                    "WHERE h.recording_id = ? AND h.offset - q.offset BETWEEN ? AND ? ORDER BY q.offset",
+                    (recording_id, delta - 1, delta + 1),
+                )
+            ]
+            self.conn.execute("DELETE FROM query")
+
+        start = matched[0] * FRAME_SECONDS
+        end = min(duration, (matched[-1] + MAX_DELTA) * FRAME_SECONDS)
+        if end - start < min(MIN_OVERLAP_SECONDS, duration * DUPLICATE_COVERAGE):
+            return None
+        # Chance alignments are spread thinly over the query; a real overlap
+        # accounts for a sizeable share of the hashes inside it.
+        in_overlap = np.count_nonzero((offsets >= matched[0]) & (offsets <= matched[-1]))
+        if best_score < MIN_MATCH_RATIO * in_overlap:
+            return None
+
+        source, stored_segments, stored_duration = self.conn.execute(
+            "SELECT source, segments, duration FROM recordings WHERE id = ?", (recording_id,)
+        ).fetchone()
+        shift = delta * FRAME_SECONDS
+        # The first and last landmarks fall a little inside the true overlap;
+        # snap to where the two recordings actually start and stop overlapping
+        first, last = max(0.0, -shift), min(duration, stored_duration - shift)
+        if start - first <= EDGE_SLACK_SECONDS:
+            start = first
+        if last - end <= EDGE_SLACK_SECONDS:
+            end = last
+        coverage = (end - start) / duration if duration else 0.0
+        kind = 'duplicate' if coverage >= DUPLICATE_COVERAGE else 'partial'
+
+        segments = []
+        for segment in json.loads(stored_segments):
+            segment_start = segment['start'] - shift
+            segment_end = segment['end'] - shift
+            if segment_start >= start - SEGMENT_TOLERANCE and segment_end <= end + SEGMENT_TOLERANCE:
+                segments.append({
+                    'start': max(0.0, segment_start),
+                    'end': min(duration, segment_end),
+                    'text': segment['text'],
+                })
+
+        logger.info(f"Fingerprint match with recording {recording_id} ({kind}, {coverage:.0%} coverage)")
+        return {
+            'recording_id': recording_id,
+            'source': source,
+            'kind': kind,
+            'coverage': coverage,
+            'start': start,
+            'end': end,
+            'segments': segments,
+        }
+
+
+def uncovered_spans(segments: List[Dict[str, Any]], duration: float, min_seconds: float = 0.0) -> List[Tuple[float, float]]:
+    """
+    Stretches of 0..duration not covered by any of the (sorted) segments, at
+    least min_seconds long.
+    """
+    spans = []
+    position = 0.0
+    for segment in segments:
+        if segment['start'] - position >= min_seconds and segment['start'] > position:
+            spans.append((position, segment['start']))
+        position = max(position, segment['end'])
+    if duration - position >= min_seconds and duration > position:
+        spans.append((position, duration))
+    return spans
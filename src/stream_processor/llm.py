@@ -0,0 +1,149 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Token budgets for the variable parts of the GPT summary prompts
+DESCRIPTION_TOKENS = 400
+TAGS_TOKENS = 60
+EXCERPT_TOKENS = 600
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the encoding files cannot be fetched
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Trim text to at most max_tokens tokens, cutting at a word boundary.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut.rstrip() + "..."
+
+
+def dedupe_tags(tags: Iterable[str], max_tokens: int = TAGS_TOKENS) -> List[str]:
+    """
+    Drop repeated tags (ignoring case and spacing) and keep as many as fit in max_tokens.
+    """
+    seen = set()
+    kept = []
+    used = 0
+    for tag in tags:
+        key = " ".join(tag.casefold().split())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        cost = count_tokens(tag) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(tag)
+        used += cost
+    return kept
+
+
+def extractive_excerpt(text: str, max_tokens: int = EXCERPT_TOKENS) -> str:
+    """
+    Pick the most representative sentences of a transcript within max_tokens.
+
+    Sentences are scored by the average corpus frequency of their longer
+    words and the best ones are returned in their original order.
+    """
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+    if not sentences:
+        return ""
+
+    def words(sentence):
+        return [w for w in re.findall(r"\w+", sentence.casefold()) if len(w) > 3]
+
+    frequencies = Counter(w for sentence in sentences for w in words(sentence))
+    scores = []
+    for index, sentence in enumerate(sentences):
+        sentence_words = words(sentence)
+        score = sum(frequencies[w] for w in sentence_words) / len(sentence_words) if sentence_words else 0.0
+        scores.append((score, index))
+
+    picked = []
+    used = 0
+    for score, index in sorted(scores, reverse=True):
+        cost = count_tokens(sentences[index])
+        if used + cost > max_tokens:
+            continue
+        picked.append(index)
+        used += cost
+    return " ".join(sentences[i] for i in sorted(picked))
+
+
+def stream_chat_completion(client, messages: List[Dict[str, str]], section_file: Optional[Path] = None,
+                           **options) -> Dict[str, Any]:
+    """
+    Run a streamed chat completion, appending each text delta to section_file
+    as it arrives (the file is started over on every call).
+
+    Returns the full text with token counts, time to first token and total time.
+    Usage reported by the API is preferred; otherwise tokens are counted locally.
+    """
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+    usage = None
+
+    stream = client.chat.completions.create(
+        messages=messages, stream=True, stream_options={"include_usage": True}, **options
+    )
+    with open(section_file, "w", encoding="utf-8") if section_file else nullcontext() as f:
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(delta)
+            if f:
+                f.write(delta)
+                f.flush()
+
+    text = "".join(parts)
+    stats = {
+        'model': options.get('model'),
+        'prompt_tokens': usage.prompt_tokens if usage else sum(count_tokens(m['content']) for m in messages),
+        'completion_tokens': usage.completion_tokens if usage else count_tokens(text),
+        'time_to_first_token': round(first_token, 3) if first_token is not None else None,
+        'total_time': round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"LLM call: {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens, "
+                f"first token after {stats['time_to_first_token']}s, {stats['total_time']}s total")
+    return {'text': text.strip(), 'stats': stats}
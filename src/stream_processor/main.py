@@ -9,13 +9,24 @@ from transformers import pipeline
 import argparse
 import warnings
 import json
+import asyncio
 from numba.core.errors import NumbaDeprecationWarning, NumbaPendingDeprecationWarning
-from stream_processor.youtube_processor import get_video_info, process_youtube
-from stream_processor.spotify_processor import process_spotify
-from stream_processor.text_processor import process_text
+from stream_processor.youtube_processor import client, download_audio, generate_metadata, generate_rich_summary, get_video_info
+from stream_processor.llm import DESCRIPTION_TOKENS, extractive_excerpt, stream_chat_completion, truncate_to_tokens
+from stream_processor.text_processor import iter_source_chunks, iter_text_chunks, process_text, read_preview
+from stream_processor.fingerprint import FingerprintIndex, compute_fingerprint, uncovered_spans
+from stream_processor.cascade import DECODE_PROFILES, drop_covered, low_confidence_spans, merge_segments, redecode_windows
+from stream_processor.search import SEARCH_DB_NAME, SearchIndex
+from stream_processor.work_queue import DEFAULT_LEASE_SECONDS, WorkQueue, run_worker
+from stream_processor.pipeline import DEFAULT_QUEUE_SIZE, DEFAULT_REPORT_INTERVAL, Pipeline, parse_concurrency
+from stream_processor.resources import HostBudget, apply_thread_budget, core_slices, plan_thread_budget, rebalance_checkpoint
+from stream_processor.supervisor import RECYCLE_EXIT_CODE, RecyclePolicy, supervise, track_memory
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
+import sys
 import time
+import tempfile
+from functools import lru_cache
 
 # Suppress Numba deprecation warnings
 warnings.filterwarnings("ignore", category=NumbaDeprecationWarning)
@@ -31,6 +42,10 @@ client_credentials_manager = SpotifyClientCredentials(
 )
 sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
 
+FINGERPRINT_DB_NAME = "fingerprints.db"
+# Uncovered stretches shorter than this are not worth a Whisper pass
+MIN_TRANSCRIBE_SECONDS = 1.0
+
 def create_output_directory():
     output_dir = Path.home() / "streamgenius_output"
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -39,62 +54,201 @@ def create_output_directory():
 def split_audio(audio_file, chunk_duration=30):
     """Split audio file into chunks."""
     from pydub import AudioSegment
-    audio = AudioSegment.from_wav(audio_file)
+    audio = AudioSegment.from_file(audio_file)
     chunks = []
     for i in range(0, len(audio), chunk_duration * 1000):
         chunks.append(audio[i:i + chunk_duration * 1000])
     return chunks
 
-def transcribe_audio(audio_file: Path, model_size="tiny"):
-    if not audio_file.exists():
-        raise FileNotFoundError(f"Audio file not found: {audio_file}")
-    
+def _transcribe_span(model, audio, start, end, **decode_options):
+    """Transcribe a slice of decoded audio and shift segment times to the full timeline."""
+    # Each span is a safe point to resize thread pools to a changed host share
+    rebalance_checkpoint()
+    span = audio[int(start * whisper.audio.SAMPLE_RATE):int(end * whisper.audio.SAMPLE_RATE)]
+    result = model.transcribe(span, fp16=False, **decode_options)
+    return [dict(segment, start=segment['start'] + start, end=segment['end'] + start)
+            for segment in result["segments"]]
+
+# Whisper models preloaded with warm_whisper_models(); they stay resident and
+# are inherited by forked worker processes instead of being loaded per job
+_warm_whisper_models = {}
+
+def warm_whisper_models(model_sizes):
+    for model_size in model_sizes:
+        if model_size not in _warm_whisper_models:
+            print(f"Preloading Whisper {model_size} model...")
+            _warm_whisper_models[model_size] = whisper.load_model(model_size, device="cpu", in_memory=True)
+
+def load_whisper_model(model_size):
+    if model_size in _warm_whisper_models:
+        return _warm_whisper_models[model_size]
     # Load the model with FP32 precision
-    model = whisper.load_model(model_size, device="cpu", in_memory=True)
-    
-    # Transcribe with FP32 precision
-    result = model.transcribe(str(audio_file), fp16=False)
-    
-    del model
-    if torch.cuda.is_available():
+    return whisper.load_model(model_size, device="cpu", in_memory=True)
+
+def release_whisper_model(model_size):
+    """Free memory after a cold model's last use; warm models are kept."""
+    if model_size not in _warm_whisper_models and torch.cuda.is_available():
         torch.cuda.empty_cache()
-    
-    return result["text"]
+
+def _cascade(segments, audio, duration, regions, cascade_model):
+    """
+    Re-decode low-confidence segments with a larger model and merge the results.
+    Only the `regions` the first pass transcribed are re-decoded.
+    """
+    spans = low_confidence_spans(segments, duration)
+    if not spans:
+        return segments
+
+    windows = redecode_windows(spans, regions)
+    if windows == list(regions):
+        print(f"Re-decoding the transcribed audio with the {cascade_model} model ({len(spans)} low-confidence spans)...")
+    else:
+        print(f"Re-decoding {len(spans)} low-confidence span(s) in {len(windows)} window(s) with the {cascade_model} model...")
+    model = load_whisper_model(cascade_model)
+    redecoded = [(window, _transcribe_span(model, audio, *window)) for window in windows]
+
+    del model
+    release_whisper_model(cascade_model)
+
+    return merge_segments(segments, redecoded)
+
+def transcribe_audio_segments(audio_file: Path, model_size="tiny", fingerprint_index=None, audio=None,
+                              cascade_model=None, decode_profile="default"):
+    """
+    Transcribe an audio file, returning the text and timestamped segments.
+
+    When a fingerprint index is given, the decoded audio is looked up first and
+    stored segments lying inside the match are reused; only the stretches they
+    leave uncovered are transcribed. Pass `audio` to reuse
+    samples already decoded at 16 kHz.
+
+    With `cascade_model`, the audio is decoded with `model_size` first and only
+    the segments failing Whisper's confidence thresholds (average log
+    probability, compression ratio, no-speech probability) are re-decoded with
+    the larger model. `decode_profile` selects the first-pass decoding options
+    from cascade.DECODE_PROFILES.
+    """
+    if not audio_file.exists():
+        raise FileNotFoundError(f"Audio file not found: {audio_file}")
+
+    if audio is None:
+        audio = whisper.load_audio(str(audio_file))
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+
+    match = None
+    if fingerprint_index is not None:
+        hashes, offsets = compute_fingerprint(audio)
+        match = fingerprint_index.lookup(hashes, offsets, duration)
+
+    reused = match['segments'] if match else []
+    if match:
+        print(f"Reusing {len(reused)} segments from a {match['kind']} recording ({match['source']})")
+    # Whatever the reused segments leave uncovered, including the edges of a
+    # clip that cut through a stored segment, is transcribed
+    gaps = uncovered_spans(reused, duration, MIN_TRANSCRIBE_SECONDS)
+
+    transcribed = []
+    if gaps:
+        model = load_whisper_model(model_size)
+
+        decode_options = DECODE_PROFILES[decode_profile]
+        for start, end in gaps:
+            transcribed.extend(_transcribe_span(model, audio, start, end, **decode_options))
+
+        del model
+        release_whisper_model(model_size)
+
+        if cascade_model and cascade_model != model_size:
+            transcribed = _cascade(transcribed, audio, duration, gaps, cascade_model)
+            # Never let re-decoded text duplicate what was reused
+            transcribed = drop_covered(transcribed, reused)
+
+    segments = sorted(reused + transcribed, key=lambda segment: segment['start'])
+
+    if fingerprint_index is not None and (transcribed or not match):
+        fingerprint_index.add(str(audio_file), hashes, offsets, duration, segments)
+
+    return {
+        'text': "".join(segment['text'] for segment in segments).strip(),
+        'segments': segments,
+        'duration': duration,
+    }
+
+def transcribe_audio(audio_file: Path, model_size="tiny", fingerprint_index=None, cascade_model=None, decode_profile="default"):
+    return transcribe_audio_segments(
+        audio_file, model_size, fingerprint_index, cascade_model=cascade_model, decode_profile=decode_profile
+    )["text"]
+
+# Maximum number of characters GoogleTranslator accepts per request
+TRANSLATE_MAX_LENGTH = 4999
+# Partial summaries are merged once they grow past this many words, so the
+# streaming summarizer only ever holds a bounded amount of text
+MAX_PENDING_SUMMARY_WORDS = 2000
+
+def translate_chunks(chunks, target_lang='pt'):
+    """Lazily translate an iterable of text chunks, yielding one translated part at a time."""
+    translator = None
+    for chunk in chunks:
+        if translator is None:
+            translator = GoogleTranslator(source=detect(chunk), target=target_lang)
+        # Split text into smaller parts if it's too long
+        for i in range(0, len(chunk), TRANSLATE_MAX_LENGTH):
+            yield translator.translate(chunk[i:i + TRANSLATE_MAX_LENGTH])
 
 def translate_text(text, target_lang='pt'):
-    detected_lang = detect(text)
-    translator = GoogleTranslator(source=detected_lang, target=target_lang)
+    return " ".join(translate_chunks([text], target_lang)).strip()
+
+def write_through(chunks, output_file: Path):
+    """Write each chunk to output_file as it passes through, then yield it on."""
+    with open(output_file, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            f.write("\n\n")
+            f.flush()
+            yield chunk
+
+@lru_cache(maxsize=1)
+def get_summarizer():
+    return pipeline("summarization", model="facebook/bart-large-cnn")
+
+def _summarize_chunk(summarizer, chunk):
+    rebalance_checkpoint()
+    # Adjust max_length based on input length
+    chunk_length = len(chunk.split())  # Count words instead of characters
     
-    # Split text into smaller parts if it's too long
-    max_length = 4999
-    parts = [text[i:i+max_length] for i in range(0, len(text), max_length)]
+    # Set max_length to be about half the input length, but not less than 30 or more than 150
+    adjusted_max_length = max(30, min(chunk_length // 2, 150))
     
-    translated_text = ""
-    for part in parts:
-        translated_text += translator.translate(part) + " "
+    # Ensure max_length is always less than input length
+    if adjusted_max_length >= chunk_length:
+        adjusted_max_length = max(30, chunk_length - 1)
     
-    return translated_text.strip()
+    summary = summarizer(chunk, max_length=adjusted_max_length, min_length=30, do_sample=False, clean_up_tokenization_spaces=True)
+    return summary[0]['summary_text']
 
-def summarize_text(text, max_length=150, max_input_length=1024):
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    
-    # Split the text into smaller chunks
-    chunks = [text[i:i+max_input_length] for i in range(0, len(text), max_input_length)]
+def summarize_chunks(chunks, max_length=150, max_input_length=1024):
+    """
+    Map-reduce summarization over an iterable of text chunks.
+
+    Each chunk is summarized as it arrives; partial summaries are merged whenever
+    they exceed MAX_PENDING_SUMMARY_WORDS, and a final pass brings the result
+    under max_length words.
+    """
+    summarizer = get_summarizer()
     
     summaries = []
-    for chunk in chunks:
-        # Adjust max_length based on input length
-        chunk_length = len(chunk.split())  # Count words instead of characters
-        
-        # Set max_length to be about half the input length, but not less than 30 or more than 150
-        adjusted_max_length = max(30, min(chunk_length // 2, 150))
-        
-        # Ensure max_length is always less than input length
-        if adjusted_max_length >= chunk_length:
-            adjusted_max_length = max(30, chunk_length - 1)
+    pending_words = 0
+    for text in chunks:
+        # Split the text into smaller chunks
+        for i in range(0, len(text), max_input_length):
+            summary = _summarize_chunk(summarizer, text[i:i + max_input_length])
+            summaries.append(summary)
+            pending_words += len(summary.split())
         
-        summary = summarizer(chunk, max_length=adjusted_max_length, min_length=30, do_sample=False, clean_up_tokenization_spaces=True)
-        summaries.append(summary[0]['summary_text'])
+        if pending_words > MAX_PENDING_SUMMARY_WORDS:
+            merged = summarize_text(" ".join(summaries), MAX_PENDING_SUMMARY_WORDS // 4, max_input_length)
+            summaries = [merged]
+            pending_words = len(merged.split())
     
     # Combine the summaries
     final_summary = " ".join(summaries)
@@ -105,7 +259,18 @@ def summarize_text(text, max_length=150, max_input_length=1024):
     
     return final_summary
 
-def generate_spotify_summary(spotify_info):
+def summarize_text(text, max_length=150, max_input_length=1024):
+    return summarize_chunks([text], max_length, max_input_length)
+
+def generate_spotify_summary(spotify_info, transcript=None, section_file=None, stats=None):
+    """
+    Generate a GPT summary of a Spotify track or episode, streamed into section_file.
+
+    The episode description is trimmed to a token budget and an extractive
+    excerpt of the transcript is added when one is given.
+    """
+    excerpt = extractive_excerpt(transcript) if transcript else ""
+    excerpt_section = f"\n        Trecho da transcrição:\n        {excerpt}\n" if excerpt else ""
     if spotify_info['type'] == 'track':
         prompt = f"""
         Gere um resumo detalhado e envolvente da seguinte faixa do Spotify em português do Brasil:
@@ -115,7 +280,7 @@ def generate_spotify_summary(spotify_info):
         Álbum: {spotify_info['album']}
         Data de lançamento: {spotify_info['release_date']}
         Duração: {spotify_info['duration_ms'] // 1000} segundos
-
+{excerpt_section}
         Por favor, inclua os seguintes elementos no formato Markdown:
 
         1. ## Visão Geral
@@ -145,8 +310,8 @@ def generate_spotify_summary(spotify_info):
         Duração: {spotify_info['duration_ms'] // 1000} segundos
 
         Descrição do episódio:
-        {spotify_info['description']}
-
+        {truncate_to_tokens(spotify_info['description'] or '', DESCRIPTION_TOKENS)}
+{excerpt_section}
         Por favor, inclua os seguintes elementos no formato Markdown:
 
         1. ## Visão Geral
@@ -167,77 +332,84 @@ def generate_spotify_summary(spotify_info):
         Faça o resumo envolvente, informativo e com cerca de 300-400 palavras. Use formatação Markdown para melhorar a legibilidade.
         """
 
+    messages = [
+        {"role": "system", "content": "Você é um assistente especializado em criar resumos detalhados e envolventes de conteúdo do Spotify em português do Brasil."},
+        {"role": "user", "content": prompt}
+    ]
     for attempt in range(3):
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Você é um assistente especializado em criar resumos detalhados e envolventes de conteúdo do Spotify em português do Brasil."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                n=1,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content.strip()
+            result = stream_chat_completion(client, messages, section_file, model="gpt-4", max_tokens=800, n=1, temperature=0.7)
+            if stats is not None:
+                stats.update(result['stats'])
+            return result['text']
         except Exception as e:
             print(f"Tentativa {attempt + 1} de chamada à API OpenAI falhou: {str(e)}")
             time.sleep(5)
     raise Exception("Falha ao gerar o resumo após 3 tentativas")
 
-def process_spotify(url: str, output_dir: Path):
+def get_spotify_info(url: str):
     """
     Get track or episode information from Spotify.
     """
+    # Extract Spotify ID from URL
+    if 'track' in url:
+        spotify_id = url.split('track/')[1].split('?')[0]
+        track = sp.track(spotify_id)
+        return {
+            'type': 'track',
+            'name': track['name'],
+            'artists': [artist['name'] for artist in track['artists']],
+            'album': track['album']['name'],
+            'release_date': track['album']['release_date'],
+            'duration_ms': track['duration_ms'],
+            'url': url
+        }
+    elif 'episode' in url:
+        spotify_id = url.split('episode/')[1].split('?')[0]
+        episode = sp.episode(spotify_id)
+        return {
+            'type': 'episode',
+            'name': episode['name'],
+            'show': episode['show']['name'],
+            'release_date': episode['release_date'],
+            'duration_ms': episode['duration_ms'],
+            'description': episode['description'],
+            'url': url
+        }
+    raise ValueError("Unsupported Spotify content type")
+
+def download_spotify_audio(info, output_dir: Path):
+    """
+    Download a Spotify track with spotdl. Returns None when no audio is available.
+    """
+    if info['type'] != 'track':
+        print("Note: Spotify podcast episodes cannot be downloaded directly. Only metadata is available.")
+        return None
+    # Attempt to download using spotdl
     try:
-        # Extract Spotify ID from URL
-        if 'track' in url:
-            spotify_id = url.split('track/')[1].split('?')[0]
-            track = sp.track(spotify_id)
-            info = {
-                'type': 'track',
-                'name': track['name'],
-                'artists': [artist['name'] for artist in track['artists']],
-                'album': track['album']['name'],
-                'release_date': track['album']['release_date'],
-                'duration_ms': track['duration_ms'],
-                'url': url
-            }
-            # Attempt to download using spotdl
-            try:
-                result = subprocess.run(
-                    ["spotdl", "--output", str(output_dir), "--print-errors", "--format", "mp3", url],
-                    capture_output=True, text=True, check=True, input='n\n', encoding='utf-8'
-                )
-                file_name = f"{info['artists'][0]} - {info['name']}.mp3"
-                audio_file = output_dir / file_name
-            except subprocess.CalledProcessError:
-                print("Warning: Unable to download audio. Proceeding with metadata only.")
-                audio_file = None
-        elif 'episode' in url:
-            spotify_id = url.split('episode/')[1].split('?')[0]
-            episode = sp.episode(spotify_id)
-            info = {
-                'type': 'episode',
-                'name': episode['name'],
-                'show': episode['show']['name'],
-                'release_date': episode['release_date'],
-                'duration_ms': episode['duration_ms'],
-                'description': episode['description'],
-                'url': url
-            }
-            print("Note: Spotify podcast episodes cannot be downloaded directly. Only metadata is available.")
-            audio_file = None
-        else:
-            raise ValueError("Unsupported Spotify content type")
+        subprocess.run(
+            ["spotdl", "--output", str(output_dir), "--print-errors", "--format", "mp3", info['url']],
+            capture_output=True, text=True, check=True, input='n\n', encoding='utf-8'
+        )
+        return output_dir / f"{info['artists'][0]} - {info['name']}.mp3"
+    except subprocess.CalledProcessError:
+        print("Warning: Unable to download audio. Proceeding with metadata only.")
+        return None
 
-        return info, audio_file
+# Processing is split into stages that each read and extend an item dict. An
+# item only holds JSON-serializable values, except for keys starting with an
+# underscore, which are transient (e.g. decoded audio) and are rebuilt by later
+# stages when an item is handed between processes.
+STAGES = ("metadata", "download", "decode", "transcribe", "translate", "summarize", "llm_summary", "render")
 
-    except Exception as e:
-        print(f"Error processing Spotify content: {str(e)}")
-        raise
+def content_kind(url):
+    if "youtube.com" in url or "youtu.be" in url:
+        return 'youtube'
+    elif "spotify.com" in url:
+        return 'spotify'
+    return 'text'
 
-def main(url, output_dir=None, model_size="tiny"):
+def new_item(url, output_dir=None, model_size="tiny", dedup=True, cascade_model=None, decode_profile="default"):
     # Use the provided output directory or create a default one
     if output_dir:
         output_dir = Path(output_dir)
@@ -245,179 +417,423 @@ def main(url, output_dir=None, model_size="tiny"):
     else:
         output_dir = create_output_directory()
 
-    youtube_data = None  # Initialize youtube_data to None
-
-    if "youtube.com" in url or "youtu.be" in url:
-        # Process YouTube video
+    # Items may be processed by workers with another working directory (or on
+    # another host), so local paths are stored as absolute paths
+    kind = content_kind(url)
+    if kind == 'text' and not url.startswith(('http://', 'https://')):
+        url = str(Path(url).resolve())
+
+    return {
+        'url': url,
+        'kind': kind,
+        'output_dir': str(output_dir.resolve()),
+        'model_size': model_size,
+        'cascade_model': cascade_model,
+        'decode_profile': decode_profile,
+        'dedup': dedup,
+    }
+
+def stage_metadata(item):
+    url = item['url']
+    if item['kind'] == 'youtube':
         video_info = get_video_info(url)
-        title = video_info['title']
-        channel = video_info['channel']
-        video_id = video_info['video_id']
-        print(f"Title: {title}")
-        print(f"Channel: {channel}")
-
-        try:
-            youtube_data = process_youtube(url, output_dir)
-            print(f"Audio file saved as: {youtube_data['audio_file']}")
-        except Exception as e:
-            print(f"Warning: Error during YouTube processing - {str(e)}")
-            print("Continuing with available data...")
-    elif "spotify.com" in url:
-        # Process Spotify track or episode
-        try:
-            spotify_info, audio_file = process_spotify(url, output_dir)
-            title = spotify_info['name']
-            content_type = spotify_info['type']
-            
-            if content_type == 'track':
-                artists = ", ".join(spotify_info['artists'])
-                print(f"Track: {title}")
-                print(f"Artist(s): {artists}")
-            else:
-                show = spotify_info['show']
-                print(f"Episode: {title}")
-                print(f"Podcast: {show}")
-            
-            # Generate a summary for Spotify content
-            spotify_summary = generate_spotify_summary(spotify_info)
-            
-            # If audio file is available, transcribe and process it
-            if audio_file and audio_file.exists():
-                print("Transcribing audio...")
-                transcript = transcribe_audio(audio_file, model_size)
-                print("Translating transcript...")
-                translated_transcript = translate_text(transcript)
-                print("Generating summary...")
-                summary = summarize_text(translated_transcript, max_length=200, max_input_length=1024)
-            else:
-                transcript = "Audio não disponível para transcrição."
-                translated_transcript = "Audio não disponível para tradução."
-                summary = "Resumo no disponível devido à falta de áudio."
-            
-            # Save results
-            output_file = output_dir / f"{title}.md".replace(" ", "_")
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(f"# {title}\n\n")
-                if content_type == 'track':
-                    f.write(f"**Artista(s):** {artists}\n\n")
-                else:
-                    f.write(f"**Podcast:** {show}\n\n")
-                f.write("## Informações do Spotify\n\n")
-                f.write("```json\n")
-                f.write(json.dumps(spotify_info, indent=2, ensure_ascii=False))
-                f.write("\n```\n\n")
-                f.write("## Resumo do Conteúdo\n\n")
-                f.write(spotify_summary)
-                f.write("\n\n## Transcrição Original\n\n")
-                f.write("```\n")
-                f.write(transcript)
-                f.write("\n```\n\n")
-                f.write("## Transcrição em Português\n\n")
-                f.write("```\n")
-                f.write(translated_transcript)
-                f.write("\n```\n\n")
-                f.write("## Resumo da Transcrição\n\n")
-                f.write(summary)
-            
-            print(f"Resultados salvos em {output_file}")
-
-            # Clean up
-            if audio_file and audio_file.exists():
-                audio_file.unlink()
-
-        except Exception as e:
-            print(f"Erro ao processar conteúdo do Spotify: {str(e)}")
-        return
+        item['info'] = video_info
+        item['title'] = video_info['title']
+        item['metadata'] = generate_metadata(video_info)
+        print(f"Title: {video_info['title']}")
+        print(f"Channel: {video_info['channel']}")
+    elif item['kind'] == 'spotify':
+        spotify_info = get_spotify_info(url)
+        item['info'] = spotify_info
+        item['title'] = spotify_info['name']
+        item['metadata'] = spotify_info
+        if spotify_info['type'] == 'track':
+            print(f"Track: {spotify_info['name']}")
+            print(f"Artist(s): {', '.join(spotify_info['artists'])}")
+        else:
+            print(f"Episode: {spotify_info['name']}")
+            print(f"Podcast: {spotify_info['show']}")
     else:
-        # Process text content (blog or local file)
-        try:
-            text_info = process_text(url, output_dir)
-            title = text_info['title']
-            content = text_info['content']
-            print(f"Title: {title}")
-            
-            # Translate content
-            print("Translating content...")
-            translated_content = translate_text(content)
-
-            # Summarize content
-            print("Generating summary...")
-            summary = summarize_text(translated_content, max_length=200, max_input_length=1024)
-            
-            # Save results
-            output_file = output_dir / f"{title}.md".replace(" ", "_")
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(f"# {title}\n\n")
-                f.write(f"**Source:** {text_info['url']}\n\n")
-                f.write("## Original Content\n\n")
-                f.write("```\n")
-                f.write(content[:1000] + "..." if len(content) > 1000 else content)
-                f.write("\n```\n\n")
-                f.write("## Translated Content\n\n")
-                f.write("```\n")
-                f.write(translated_content[:1000] + "..." if len(translated_content) > 1000 else translated_content)
-                f.write("\n```\n\n")
-                f.write("## Summary\n\n")
-                f.write(summary)
-
-            print(f"Results saved in {output_file}")
-
-        except Exception as e:
-            print(f"Error processing text content: {str(e)}")
-        return
+        text_info = process_text(url, Path(item['output_dir']))
+        item['info'] = text_info
+        item['title'] = text_info['title']
+        print(f"Title: {text_info['title']}")
+    return item
+
+def stage_download(item):
+    output_dir = Path(item['output_dir'])
+    audio_file = None
+    if item['kind'] == 'youtube':
+        audio_file = download_audio(item['url'], output_dir, item['info']['video_id'])
+        print(f"Audio file saved as: {audio_file}")
+    elif item['kind'] == 'spotify':
+        audio_file = download_spotify_audio(item['info'], output_dir)
+    item['audio_file'] = str(audio_file) if audio_file else None
+    return item
+
+def _has_audio(item):
+    return bool(item.get('audio_file')) and Path(item['audio_file']).exists()
+
+def stage_decode(item):
+    if _has_audio(item):
+        item['_audio'] = whisper.load_audio(item['audio_file'])
+    return item
+
+def stage_transcribe(item):
+    if item['kind'] == 'text':
+        return item
+    if not _has_audio(item):
+        if item['kind'] == 'youtube':
+            raise FileNotFoundError("Audio file not found or not downloaded.")
+        item['transcript'] = "Audio não disponível para transcrição."
+        item['segments'] = []
+        return item
 
-    if youtube_data is None or not youtube_data['audio_file'].exists():
-        print("Error: Audio file not found or not downloaded.")
-        return
-
-    # Transcribe audio
     print("Transcribing audio...")
-    transcript = transcribe_audio(youtube_data['audio_file'], model_size)
-
-    # Translate transcript
-    print("Translating transcript...")
-    translated_transcript = translate_text(transcript)
-
-    # Summarize transcript
-    print("Generating summary...")
-    summary = summarize_text(translated_transcript, max_length=200, max_input_length=1024)
-
-    # Save results
-    output_file = output_dir / f"{youtube_data['channel']}_{youtube_data['title']}.md".replace(" ", "_")
+    fingerprint_index = None
+    if item['dedup']:
+        # Reuse transcripts of audio we have already seen under another URL
+        fingerprint_index = FingerprintIndex(Path(item['output_dir']) / FINGERPRINT_DB_NAME)
+    try:
+        transcription = transcribe_audio_segments(
+            Path(item['audio_file']), item['model_size'], fingerprint_index, audio=item.pop('_audio', None),
+            cascade_model=item.get('cascade_model'), decode_profile=item.get('decode_profile', 'default'),
+        )
+    finally:
+        if fingerprint_index is not None:
+            fingerprint_index.close()
+    item['transcript'] = transcription['text']
+    item['segments'] = [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in transcription['segments']]
+    return item
+
+def stage_translate(item):
+    if item['kind'] == 'text':
+        # Stream the content through translation chunk by chunk, writing the
+        # translation to disk as it is produced
+        print("Translating content...")
+        title = item['title']
+        translated_file = Path(item['output_dir']) / f"{title}_translated.txt".replace(" ", "_")
+        for _ in write_through(translate_chunks(iter_source_chunks(item['info'])), translated_file):
+            pass
+        item['translated_file'] = str(translated_file)
+    elif _has_audio(item):
+        print("Translating transcript...")
+        item['translated'] = translate_text(item['transcript'])
+    else:
+        item['translated'] = "Audio não disponível para tradução."
+    return item
+
+def stage_summarize(item):
+    if item['kind'] == 'text':
+        print("Generating summary...")
+        chunks = iter_text_chunks(Path(item['translated_file']))
+        item['summary'] = summarize_chunks(chunks, max_length=200, max_input_length=1024)
+    elif _has_audio(item):
+        print("Generating summary...")
+        item['summary'] = summarize_text(item['translated'], max_length=200, max_input_length=1024)
+    else:
+        item['summary'] = "Resumo no disponível devido à falta de áudio."
+    return item
+
+def stage_llm_summary(item):
+    if item['kind'] == 'text':
+        return item
+    # The response is streamed into its own file so the section can be
+    # followed while it is generated; stage_render removes it
+    section_file = Path(item['output_dir']) / f"{item['title']}_llm_summary.md".replace(" ", "_")
+    # Without audio the transcript only holds a placeholder message
+    transcript = item.get('transcript') if item.get('segments') or _has_audio(item) else None
+    stats = {}
+    if item['kind'] == 'youtube':
+        item['llm_summary'] = asyncio.run(generate_rich_summary(item['info'], transcript, section_file, stats))
+    else:
+        # Generate a summary for Spotify content
+        item['llm_summary'] = generate_spotify_summary(item['info'], transcript, section_file, stats)
+    item['llm_summary_file'] = str(section_file)
+    item['llm_stats'] = stats
+    print(f"LLM summary: {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens, "
+          f"first token after {stats['time_to_first_token']}s")
+    return item
+
+def _render_youtube(item, output_file):
+    info = item['info']
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write(f"# {youtube_data['title']}\n\n")
-        f.write(f"**Canal/Artista:** {youtube_data['channel']}\n\n")
+        f.write(f"# {info['title']}\n\n")
+        f.write(f"**Canal/Artista:** {info['channel']}\n\n")
         
         f.write("## Transcrição Original\n\n")
         f.write("```\n")
-        f.write(transcript)
+        f.write(item['transcript'])
         f.write("\n```\n\n")
         
         f.write("## Transcrição em Português\n\n")
         f.write("```\n")
-        f.write(translated_transcript)
+        f.write(item['translated'])
         f.write("\n```\n\n")
         
         f.write("## Resumo Detalhado\n\n")
-        f.write(youtube_data['summary'])
+        f.write(item['llm_summary'])
         
         f.write("\n\n## Metadados\n\n")
         f.write("```json\n")
-        f.write(json.dumps(youtube_data['metadata'], indent=2, ensure_ascii=False))
+        f.write(json.dumps(item['metadata'], indent=2, ensure_ascii=False))
         f.write("\n```\n")
 
+def _render_spotify(item, output_file):
+    spotify_info = item['info']
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"# {spotify_info['name']}\n\n")
+        if spotify_info['type'] == 'track':
+            f.write(f"**Artista(s):** {', '.join(spotify_info['artists'])}\n\n")
+        else:
+            f.write(f"**Podcast:** {spotify_info['show']}\n\n")
+        f.write("## Informações do Spotify\n\n")
+        f.write("```json\n")
+        f.write(json.dumps(spotify_info, indent=2, ensure_ascii=False))
+        f.write("\n```\n\n")
+        f.write("## Resumo do Conteúdo\n\n")
+        f.write(item['llm_summary'])
+        f.write("\n\n## Transcrição Original\n\n")
+        f.write("```\n")
+        f.write(item['transcript'])
+        f.write("\n```\n\n")
+        f.write("## Transcrição em Português\n\n")
+        f.write("```\n")
+        f.write(item['translated'])
+        f.write("\n```\n\n")
+        f.write("## Resumo da Transcrição\n\n")
+        f.write(item['summary'])
+
+def _render_text(item, output_file):
+    text_info = item['info']
+    translated_file = Path(item['translated_file'])
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(f"# {item['title']}\n\n")
+        f.write(f"**Source:** {text_info['url']}\n\n")
+        f.write("## Original Content\n\n")
+        f.write("```\n")
+        f.write(text_info['preview'])
+        f.write("\n```\n\n")
+        f.write("## Translated Content\n\n")
+        f.write(f"Full translation: `{translated_file.name}`\n\n")
+        f.write("```\n")
+        f.write(read_preview(translated_file))
+        f.write("\n```\n\n")
+        f.write("## Summary\n\n")
+        f.write(item['summary'])
+
+def stage_render(item):
+    output_dir = Path(item['output_dir'])
+    kind = item['kind']
+    if kind == 'youtube':
+        output_file = output_dir / f"{item['info']['channel']}_{item['title']}.md".replace(" ", "_")
+        _render_youtube(item, output_file)
+        fields = {'translation': item['translated'], 'summary': item['summary'], 'llm_summary': item['llm_summary']}
+        content_type = 'video'
+    elif kind == 'spotify':
+        output_file = output_dir / f"{item['title']}.md".replace(" ", "_")
+        _render_spotify(item, output_file)
+        fields = {'translation': item['translated'], 'summary': item['summary'], 'llm_summary': item['llm_summary']}
+        content_type = item['info']['type']
+    else:
+        output_file = output_dir / f"{item['title']}.md".replace(" ", "_")
+        _render_text(item, output_file)
+        fields = {
+            'content': iter_source_chunks(item['info']),
+            'translation': iter_text_chunks(Path(item['translated_file'])),
+            'summary': item['summary'],
+        }
+        content_type = 'text'
     print(f"Resultados salvos em {output_file}")
 
+    # Every rendered output is added to the full-text search index
+    search_index = SearchIndex(output_dir / SEARCH_DB_NAME)
+    try:
+        search_index.add_document(
+            output_file, item['title'], item['url'], content_type,
+            segments=item.get('segments'), fields=fields, metadata=item.get('metadata'),
+        )
+    finally:
+        search_index.close()
+
     # Clean up
-    if youtube_data['audio_file'].exists():
-        youtube_data['audio_file'].unlink()
+    if _has_audio(item):
+        Path(item['audio_file']).unlink()
+    if item.get('llm_summary_file'):
+        Path(item['llm_summary_file']).unlink(missing_ok=True)
+    item['output_file'] = str(output_file)
+    return item
+
+STAGE_HANDLERS = {
+    "metadata": stage_metadata,
+    "download": stage_download,
+    "decode": stage_decode,
+    "transcribe": stage_transcribe,
+    "translate": stage_translate,
+    "summarize": stage_summarize,
+    "llm_summary": stage_llm_summary,
+    "render": stage_render,
+}
+
+# Queue jobs are serialized between stages, which drops the transient decoded
+# audio; decoding in its own job would be thrown away, so in queue mode the
+# decode stage passes items through and transcribe decodes the file itself
+QUEUE_STAGE_HANDLERS = dict(STAGE_HANDLERS, decode=lambda item: item)
+
+def run_stages(item, stages=STAGES):
+    for stage in stages:
+        item = STAGE_HANDLERS[stage](item)
+    return item
+
+def main(url, output_dir=None, model_size="tiny", dedup=True, cascade_model=None, decode_profile="default"):
+    item = new_item(url, output_dir, model_size, dedup, cascade_model, decode_profile)
+    try:
+        run_stages(item)
+    except Exception as e:
+        print(f"Error processing {url}: {str(e)}")
+
+# Network-bound stages get a second worker by default; CPU-heavy stages keep
+# one so they do not compete for cores
+DEFAULT_STAGE_CONCURRENCY = {"metadata": 2, "download": 2, "translate": 2, "llm_summary": 2}
+
+def run_pipeline(urls, output_dir=None, model_size="tiny", dedup=True, cascade_model=None, decode_profile="default",
+                 concurrency=None, queue_size=DEFAULT_QUEUE_SIZE, report_interval=DEFAULT_REPORT_INTERVAL):
+    """
+    Process several items at once, overlapping their stages: item N+1 can be
+    downloading while item N is transcribed and item N-1 summarized.
+    """
+    items = (new_item(url, output_dir, model_size, dedup, cascade_model, decode_profile) for url in urls)
+    pipeline = Pipeline(STAGES, STAGE_HANDLERS, dict(DEFAULT_STAGE_CONCURRENCY, **(concurrency or {})),
+                        queue_size=queue_size, report_interval=report_interval)
+    results = pipeline.run(items)
+    for item in results:
+        if 'error' in item:
+            print(f"Error processing {item['url']}: {item['error']}")
+    return results
+
+WHISPER_MODELS = ["tiny", "base", "small", "medium", "large"]
+
+def add_decoding_arguments(parser):
+    parser.add_argument("--cascade", choices=WHISPER_MODELS, help="Larger Whisper model used to re-decode only low-confidence segments of the --model pass")
+    parser.add_argument("--decode-profile", choices=sorted(DECODE_PROFILES), default="default", help="Whisper decoding profile; 'fast' is greedy with no temperature fallback (default: default)")
+
+def enqueue_main(argv=None):
+    parser = argparse.ArgumentParser(prog="streamgenius enqueue", description="Add URLs to a shared work queue.")
+    parser.add_argument("urls", nargs="+", help="URLs or local file paths to process")
+    parser.add_argument("--queue", required=True, help="Path to the shared queue database")
+    parser.add_argument("--output", help="Output directory for results; must be reachable by every worker")
+    parser.add_argument("--model", choices=WHISPER_MODELS, default="tiny", help="Whisper model size (default: tiny)")
+    parser.add_argument("--no-dedup", action="store_true", help="Disable audio fingerprint deduplication of transcripts")
+    add_decoding_arguments(parser)
+    args = parser.parse_args(argv)
+
+    queue = WorkQueue(args.queue)
+    for url in args.urls:
+        item = new_item(url, args.output, args.model, not args.no_dedup, args.cascade, args.decode_profile)
+        job_id = queue.enqueue(item, STAGES[0])
+        print(f"Queued {url} as job {job_id}")
+    queue.close()
+
+def worker_main(argv=None):
+    parser = argparse.ArgumentParser(prog="streamgenius worker", description="Process items from a shared work queue.")
+    parser.add_argument("--queue", required=True, help="Path to the shared queue database")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages this worker handles (default: all of {','.join(STAGES)})")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help=f"Lease duration in seconds (default: {DEFAULT_LEASE_SECONDS:g})")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Exit once every queued job is done or failed")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes to run on this host; the host's cores are divided among them (default: 1)")
+    parser.add_argument("--pin-cpus", action="store_true", help="Pin each worker process to a fixed slice of the cores instead of rebalancing cores among busy workers")
+    parser.add_argument("--max-jobs", type=int, help="Replace a worker process with a fresh one after this many jobs")
+    parser.add_argument("--max-rss-mb", type=float, help="Replace a worker process once its resident memory exceeds this many MB after a job")
+    parser.add_argument("--warm-models", default="", help="Comma-separated models to preload once and share with every worker process: Whisper sizes and/or 'summarizer' (e.g. small,medium,summarizer)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    warm_models = [name.strip() for name in args.warm_models.split(",") if name.strip()]
+    unknown = set(warm_models) - set(WHISPER_MODELS) - {"summarizer"}
+    if unknown:
+        parser.error(f"Unknown model(s): {', '.join(sorted(unknown))}")
+
+    # Load shared state once in the supervisor so recycled workers start warm
+    warm_whisper_models([name for name in warm_models if name in WHISPER_MODELS])
+    if "summarizer" in warm_models:
+        get_summarizer()
+
+    budget = plan_thread_budget(args.workers)
+    cpu_slices = core_slices(budget) if args.pin_cpus else [None] * args.workers
+    supervise(_queue_worker, [
+        (args.queue, args.lease, stages, args.exit_when_idle, threads, cpus, args.max_jobs, args.max_rss_mb)
+        for threads, cpus in zip(budget, cpu_slices)
+    ])
+
+# Worker processes on one host share their cores through this file; it must
+# stay on local storage even when the queue is on a shared filesystem
+HOST_BUDGET_PATH = Path(tempfile.gettempdir()) / "streamgenius_threads.db"
+
+def _queue_worker(queue_path, lease_seconds, stages, exit_when_idle, threads, cpus=None, max_jobs=None, max_rss_mb=None):
+    """
+    Run one worker process under a thread budget.
+
+    Returns RECYCLE_EXIT_CODE when the recycle policy asks for a fresh
+    process, and 0 once the queue has no more work.
+    """
+    host_budget = None
+    if cpus:
+        apply_thread_budget(threads, cpus)
+    else:
+        # Size thread pools on every job to this worker's share of the cores
+        # among the workers busy at that moment
+        host_budget = HostBudget(HOST_BUDGET_PATH)
+        apply_thread_budget(threads)
+
+    policy = RecyclePolicy(max_jobs, max_rss_mb)
+
+    def after_job(job):
+        if host_budget:
+            host_budget.release()
+        policy.job_done()
+
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    try:
+        run_worker(
+            queue, track_memory(QUEUE_STAGE_HANDLERS), STAGES, stages=stages, exit_when_idle=exit_when_idle,
+            before_job=(lambda job: host_budget.acquire()) if host_budget else None,
+            after_job=after_job, should_stop=policy.should_recycle,
+        )
+    finally:
+        queue.close()
+        if host_budget:
+            host_budget.close()
+    return RECYCLE_EXIT_CODE if policy.triggered else 0
+
+def cli(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "search":
+        from stream_processor.search import main as search_main
+        return search_main(argv[1:])
+    if argv and argv[0] == "enqueue":
+        return enqueue_main(argv[1:])
+    if argv and argv[0] == "worker":
+        return worker_main(argv[1:])
 
-if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process streaming content from YouTube, Spotify, or text sources.")
-    parser.add_argument("url", help="URL of the YouTube video, Spotify track, blog post, or path to a local file")
+    parser.add_argument("urls", nargs="+", metavar="url", help="URL of the YouTube video, Spotify track, blog post, or path to a local file; several items are processed as a pipeline")
     parser.add_argument("--output", help="Output directory for results (optional)")
-    parser.add_argument("--model", choices=["tiny", "base", "small", "medium", "large"], default="tiny", help="Whisper model size (default: tiny)")
-    args = parser.parse_args()
+    parser.add_argument("--model", choices=WHISPER_MODELS, default="tiny", help="Whisper model size (default: tiny)")
+    parser.add_argument("--no-dedup", action="store_true", help="Disable audio fingerprint deduplication of transcripts")
+    add_decoding_arguments(parser)
+    parser.add_argument("--concurrency", action="append", default=[], metavar="STAGE=N", help=f"Worker threads for a pipeline stage, repeatable or comma-separated (stages: {', '.join(STAGES)})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help=f"Items buffered between pipeline stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--report-interval", type=float, default=DEFAULT_REPORT_INTERVAL, help=f"Seconds between pipeline queue depth reports, 0 to disable (default: {DEFAULT_REPORT_INTERVAL:g})")
+    args = parser.parse_args(argv)
+
+    try:
+        concurrency = parse_concurrency(args.concurrency, STAGES)
+    except ValueError as e:
+        parser.error(str(e))
     
     # Try to update yt-dlp, but don't stop execution if it fails
     try:
@@ -425,4 +841,12 @@ if __name__ == "__main__":
     except subprocess.CalledProcessError:
         print("Warning: Failed to update yt-dlp. Continuing with the installed version.")
     
-    main(args.url, args.output, args.model)
\ No newline at end of file
+    if len(args.urls) == 1:
+        main(args.urls[0], args.output, args.model, dedup=not args.no_dedup, cascade_model=args.cascade, decode_profile=args.decode_profile)
+    else:
+        run_pipeline(args.urls, args.output, args.model, dedup=not args.no_dedup, cascade_model=args.cascade,
+                     decode_profile=args.decode_profile, concurrency=concurrency, queue_size=args.queue_size,
+                     report_interval=args.report_interval)
+
+if __name__ == "__main__":
+    cli()
\ No newline at end of file
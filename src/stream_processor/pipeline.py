@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+DEFAULT_QUEUE_SIZE = 2
+DEFAULT_REPORT_INTERVAL = 10.0
+
+# Marks the end of the input on a stage queue
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Run items through a sequence of stages, each served by its own group of
+    worker threads and fed by a bounded queue.
+
+    While one item is being transcribed the next can already be downloading
+    and the previous one summarizing. A full queue blocks the stage in front
+    of it, so a slow stage holds back the stages upstream instead of letting
+    work (and memory) pile up.
+    """
+
+    def __init__(self, stages: Sequence[str], handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]],
+                 concurrency: Optional[Dict[str, int]] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 report_interval: Optional[float] = DEFAULT_REPORT_INTERVAL):
+        self.stages = list(stages)
+        self.handlers = handlers
+        self.concurrency = {stage: max(1, (concurrency or {}).get(stage, 1)) for stage in self.stages}
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in self.stages]
+        self.results: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.active = {stage: 0 for stage in self.stages}
+        self.done = {stage: 0 for stage in self.stages}
+        self.failed = {stage: 0 for stage in self.stages}
+        self.running = {stage: 0 for stage in self.stages}
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        Current queue depth and active/done/failed counts per stage.
+        """
+        with self.lock:
+            return {
+                stage: {
+                    'queued': self.queues[i].qsize(),
+                    'active': self.active[stage],
+                    'done': self.done[stage],
+                    'failed': self.failed[stage],
+                }
+                for i, stage in enumerate(self.stages)
+            }
+
+    def format_snapshot(self) -> str:
+        return " | ".join(
+            f"{stage} q={counts['queued']} a={counts['active']} d={counts['done']}"
+            + (f" f={counts['failed']}" if counts['failed'] else "")
+            for stage, counts in self.snapshot().items()
+        )
+
+    def _forward(self, index: int, item: Dict[str, Any]):
+        if index + 1 < len(self.stages):
+            self.queues[index + 1].put(item)
+        else:
+            self.results.put(item)
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        handler = self.handlers[stage]
+        while True:
+            item = self.queues[index].get()
+            if item is _DONE:
+                break
+            if 'error' in item:
+                # Failed upstream: pass it along untouched
+                self._forward(index, item)
+                continue
+
+            with self.lock:
+                self.active[stage] += 1
+            try:
+                item = handler(item)
+                outcome = self.done
+            except Exception as e:
+                item['error'] = f"{stage}: {type(e).__name__}: {e}"
+                outcome = self.failed
+            with self.lock:
+                self.active[stage] -= 1
+                outcome[stage] += 1
+            self._forward(index, item)
+
+        # The last worker of a stage to finish tells the next stage to stop
+        with self.lock:
+            self.running[stage] -= 1
+            last = self.running[stage] == 0
+        if last and index + 1 < len(self.stages):
+            for _ in range(self.concurrency[self.stages[index + 1]]):
+                self.queues[index + 1].put(_DONE)
+
+    def _feed(self, items: Iterable[Dict[str, Any]]):
+        for item in items:
+            self.queues[0].put(item)
+        for _ in range(self.concurrency[self.stages[0]]):
+            self.queues[0].put(_DONE)
+
+    def _report(self, stop: threading.Event):
+        while not stop.wait(self.report_interval):
+            print(f"[pipeline] {self.format_snapshot()}")
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process all items and return them in completion order. Items that
+        failed in some stage carry an 'error' key and skipped the later stages.
+        """
+        threads = []
+        for index, stage in enumerate(self.stages):
+            self.running[stage] = self.concurrency[stage]
+            for n in range(self.concurrency[stage]):
+                threads.append(threading.Thread(target=self._worker, args=(index,), name=f"{stage}-{n}", daemon=True))
+        threads.append(threading.Thread(target=self._feed, args=(items,), name="feed", daemon=True))
+
+        stop = threading.Event()
+        reporter = None
+        if self.report_interval:
+            reporter = threading.Thread(target=self._report, args=(stop,), name="report", daemon=True)
+            reporter.start()
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        if reporter:
+            reporter.join()
+
+        results = []
+        while not self.results.empty():
+            results.append(self.results.get())
+        print(f"[pipeline] {len(results)} item(s) in {time.perf_counter() - started:.1f}s: {self.format_snapshot()}")
+        return results
+
+
+def parse_concurrency(values: Iterable[str], stages: Sequence[str]) -> Dict[str, int]:
+    """
+    Parse "stage=N" settings, each possibly holding several comma-separated pairs.
+    """
+    concurrency = {}
+    for value in values:
+        for pair in value.split(","):
+            if not pair.strip():
+                continue
+            stage, _, count = pair.partition("=")
+            stage = stage.strip()
+            if stage not in stages or not count.strip().isdigit() or int(count) < 1:
+                raise ValueError(f"Invalid stage concurrency '{pair}'; expected <stage>=<workers> with stage one of {', '.join(stages)}")
+            concurrency[stage] = int(count)
+    return concurrency
@@ -0,0 +1,214 @@
+import logging
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Thread pools sized by these variables are created when the library loads, so
+# they only take effect for libraries that have not been imported yet.
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS")
+
+# How often a busy worker re-checks its share of the cores at the
+# checkpoints inside a job
+REBALANCE_INTERVAL = 5.0
+
+HOST_BUDGET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    pid INTEGER PRIMARY KEY,
+    busy INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def available_cores() -> List[int]:
+    """
+    CPU ids this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_thread_budget(workers: int, cores: Optional[int] = None, weights: Optional[Sequence[float]] = None) -> List[int]:
+    """
+    Split the host's cores among worker processes.
+
+    Cores are shared out in proportion to `weights` (equal by default) using
+    largest remainders, and every worker gets at least one thread.
+    """
+    cores = cores or len(available_cores())
+    weights = list(weights or [1.0] * workers)
+    if len(weights) != workers:
+        raise ValueError("Expected one weight per worker")
+
+    total = sum(weights)
+    shares = [cores * weight / total for weight in weights]
+    budget = [max(1, int(share)) for share in shares]
+    remaining = cores - sum(budget)
+    by_remainder = sorted(range(workers), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:max(0, remaining)]:
+        budget[i] += 1
+    return budget
+
+
+def core_slices(budget: Sequence[int], cores: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """
+    Assign each worker a contiguous slice of CPU ids matching its thread budget.
+    """
+    cores = list(cores or available_cores())
+    slices = []
+    start = 0
+    for threads in budget:
+        picked = [cores[(start + i) % len(cores)] for i in range(threads)]
+        slices.append(picked)
+        start += threads
+    return slices
+
+
+def apply_thread_budget(threads: int, cpus: Optional[Sequence[int]] = None):
+    """
+    Limit this process to `threads` compute threads and optionally pin it to `cpus`.
+
+    Sets the thread-pool environment variables for libraries loaded later,
+    resizes the pools of torch and numba if they are already loaded, and turns
+    off tokenizers' own parallelism.
+    """
+    threads = max(1, int(threads))
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only allowed before the first parallel operation
+            pass
+
+    numba = sys.modules.get("numba")
+    if numba is not None:
+        try:
+            numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+        except (AttributeError, ValueError):
+            pass
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cpus))
+
+    logger.info(f"Process {os.getpid()} using {threads} thread(s)" + (f" on CPUs {list(cpus)}" if cpus else ""))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class HostBudget:
+    """
+    Share the host's cores among the busy worker processes.
+
+    Workers on one host register in a small SQLite file. Before each job a
+    worker marks itself busy and sizes its thread pools to its share of the
+    cores among the workers that are busy at that moment, so workers idling
+    on a stage with no work leave their cores to the others.
+
+    Thread-pool sizes are per thread in torch and MKL, so a new share can
+    only be applied by the thread running the job. Long jobs call
+    rebalance_checkpoint() at safe points (between transcribed spans or
+    summary chunks), which re-checks the share at most every
+    `rebalance_interval` seconds; a worker that started alone thus gives
+    cores back once others get busy.
+    """
+
+    def __init__(self, db_path: Path, cores: Optional[int] = None, rebalance_interval: float = REBALANCE_INTERVAL):
+        self.db_path = Path(db_path)
+        self.cores = cores or len(available_cores())
+        self.rebalance_interval = rebalance_interval
+        self.pid = os.getpid()
+        self.threads: Optional[int] = None
+        self.checked_at = 0.0
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.executescript(HOST_BUDGET_SCHEMA)
+        self._set_busy(False)
+
+    def close(self):
+        self.release()
+        self.conn.execute("DELETE FROM workers WHERE pid = ?", (self.pid,))
+        self.conn.close()
+
+    def _set_busy(self, busy: bool):
+        self.conn.execute(
+            "INSERT INTO workers (pid, busy, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (pid) DO UPDATE SET busy = excluded.busy, updated_at = excluded.updated_at",
+            (self.pid, int(busy), time.time()),
+        )
+
+    def _busy_workers(self) -> int:
+        pids = [pid for (pid,) in self.conn.execute("SELECT pid FROM workers WHERE busy = 1")]
+        dead = [pid for pid in pids if not _alive(pid)]
+        if dead:
+            self.conn.execute(f"DELETE FROM workers WHERE pid IN ({','.join('?' * len(dead))})", dead)
+        return len(pids) - len(dead)
+
+    def rebalance(self) -> int:
+        """
+        Apply this worker's current share of the cores on the calling thread
+        if it has changed.
+        """
+        self.checked_at = time.monotonic()
+        threads = max(1, self.cores // max(1, self._busy_workers()))
+        if threads != self.threads:
+            apply_thread_budget(threads)
+            self.threads = threads
+        return threads
+
+    def checkpoint(self) -> int:
+        """
+        Re-check the share if the last check is older than rebalance_interval.
+        """
+        if time.monotonic() - self.checked_at >= self.rebalance_interval:
+            return self.rebalance()
+        return self.threads
+
+    def acquire(self) -> int:
+        """
+        Mark this worker busy and apply its current share of the cores.
+        """
+        global _active_budget
+        self._set_busy(True)
+        _active_budget = self
+        return self.rebalance()
+
+    def release(self):
+        global _active_budget
+        if _active_budget is self:
+            _active_budget = None
+        self._set_busy(False)
+
+
+# The budget of the job currently running in this process, if any
+_active_budget: Optional[HostBudget] = None
+
+
+def rebalance_checkpoint():
+    """
+    Safe point inside a long job: apply a changed share of the host's cores.
+
+    Must be called from the thread running the job; does nothing outside a
+    HostBudget job.
+    """
+    if _active_budget is not None:
+        _active_budget.checkpoint()
@@ -0,0 +1,210 @@
+import argparse
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+SEARCH_DB_NAME = "search.db"
+PASSAGE_LENGTH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    output_file TEXT NOT NULL UNIQUE,
+    title TEXT,
+    source_url TEXT,
+    content_type TEXT,
+    metadata TEXT,
+    indexed_at TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text,
+    field UNINDEXED,
+    document_id UNINDEXED,
+    start UNINDEXED,
+    end UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def split_passages(text: str, passage_length: int = PASSAGE_LENGTH) -> List[str]:
+    """
+    Split long text into passages at whitespace so hits point at a local snippet.
+    """
+    passages = []
+    while len(text) > passage_length:
+        cut = text.rfind(" ", 0, passage_length)
+        if cut <= 0:
+            cut = passage_length
+        passages.append(text[:cut])
+        text = text[cut:].lstrip()
+    if text.strip():
+        passages.append(text)
+    return passages
+
+
+def _flatten_metadata(metadata: Dict[str, Any]) -> str:
+    lines = []
+    for key, value in metadata.items():
+        if isinstance(value, (list, tuple)):
+            value = ", ".join(str(v) for v in value)
+        lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+def _quote_query(query: str) -> str:
+    # Treat user input as plain terms rather than FTS5 syntax
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class SearchIndex:
+    """
+    Incremental SQLite FTS5 index over processed outputs.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_document(self, output_file: Path, title: str, source_url: str, content_type: str,
+                     segments: Optional[List[Dict[str, Any]]] = None,
+                     fields: Optional[Dict[str, Union[str, Iterable[str]]]] = None,
+                     metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Index one rendered output, replacing any earlier entry for the same file.
+
+        `segments` are timestamped transcript segments, `fields` maps a field name
+        (translation, summary, ...) to free text or to an iterable of text chunks,
+        which is indexed as it is consumed, and `metadata` is stored and made
+        searchable as "key: value" lines.
+        """
+        metadata = metadata or {}
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id FROM documents WHERE output_file = ?", (str(output_file),)
+            ).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM passages WHERE document_id = ?", (row[0],))
+                self.conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+            cursor = self.conn.execute(
+                "INSERT INTO documents (output_file, title, source_url, content_type, metadata, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(output_file), title, source_url, content_type,
+                 json.dumps(metadata, ensure_ascii=False, default=str), datetime.now().isoformat()),
+            )
+            document_id = cursor.lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO passages (text, field, document_id, start, end) VALUES (?, ?, ?, ?, ?)",
+                self._passage_rows(document_id, title, segments, fields, metadata),
+            )
+        return document_id
+
+    @staticmethod
+    def _passage_rows(document_id, title, segments, fields, metadata):
+        yield title, 'title', document_id, None, None
+        for segment in segments or []:
+            yield segment['text'].strip(), 'transcript', document_id, segment['start'], segment['end']
+        for field, value in (fields or {}).items():
+            chunks = [value or ""] if isinstance(value, str) or value is None else value
+            for chunk in chunks:
+                for passage in split_passages(chunk):
+                    yield passage, field, document_id, None, None
+        if metadata:
+            yield _flatten_metadata(metadata), 'metadata', document_id, None, None
+
+    def search(self, query: str, limit: int = 20, field: Optional[str] = None, raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        Return the best matching passages, most relevant first.
+
+        The query is treated as plain terms unless `raw` is set, in which case it
+        is passed to FTS5 as-is (phrases, NEAR, prefix* and boolean operators).
+        """
+        match = query if raw else _quote_query(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.title, d.output_file, d.source_url, d.content_type, p.field, p.start, p.end, "
+            "snippet(passages, 0, '[', ']', '...', 16), bm25(passages) "
+            "FROM passages p JOIN documents d ON d.id = p.document_id "
+            "WHERE passages MATCH ?"
+        )
+        params = [match]
+        if field:
+            sql += " AND p.field = ?"
+            params.append(field)
+        sql += " ORDER BY bm25(passages) LIMIT ?"
+        params.append(limit)
+
+        return [
+            {
+                'title': title,
+                'output_file': output_file,
+                'source_url': source_url,
+                'content_type': content_type,
+                'field': field_name,
+                'start': start,
+                'end': end,
+                'snippet': snippet,
+                'score': -score,
+            }
+            for title, output_file, source_url, content_type, field_name, start, end, snippet, score
+            in self.conn.execute(sql, params)
+        ]
+
+
+def _format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="streamgenius search", description="Search processed StreamGenius outputs.")
+    parser.add_argument("query", help="Search terms")
+    parser.add_argument("--output", help="Output directory holding the search index (default: ~/streamgenius_output)")
+    parser.add_argument("--field", help="Restrict hits to one field (title, transcript, translation, summary, metadata, ...)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results (default: 20)")
+    parser.add_argument("--raw", action="store_true", help="Pass the query to FTS5 unchanged")
+    args = parser.parse_args(argv)
+
+    output_dir = Path(args.output) if args.output else Path.home() / "streamgenius_output"
+    db_path = output_dir / SEARCH_DB_NAME
+    if not db_path.exists():
+        print(f"No search index found at {db_path}")
+        return
+
+    index = SearchIndex(db_path)
+    started = time.perf_counter()
+    try:
+        results = index.search(args.query, limit=args.limit, field=args.field, raw=args.raw)
+    except sqlite3.OperationalError as e:
+        # Only reachable with --raw: the query is malformed FTS5 syntax
+        print(f"Invalid search query '{args.query}': {e}")
+        return
+    finally:
+        index.close()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    for result in results:
+        location = f" @ {_format_timestamp(result['start'])}" if result['start'] is not None else ""
+        print(f"{result['title']} [{result['field']}{location}]")
+        print(f"  {result['snippet']}")
+        print(f"  {result['output_file']}")
+    print(f"{len(results)} result(s) in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Exit code a worker uses to ask its supervisor for a fresh replacement
+RECYCLE_EXIT_CODE = 75
+MEMORY_SAMPLE_INTERVAL = 0.1
+# A slot whose worker crashes this many times in a row is given up; a worker
+# that ran at least HEALTHY_RUN_SECONDS before crashing starts a new count
+MAX_CONSECUTIVE_CRASHES = 5
+HEALTHY_RUN_SECONDS = 300.0
+RESTART_DELAY = 1.0
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the lifetime peak (in KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class MemoryWatch:
+    """
+    Measure this process's resident memory over a block of work.
+
+    The peak comes from the kernel's high-water mark when it can be reset for
+    the block, and from periodic sampling otherwise.
+    """
+
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_rss = self.end_rss = self.peak_rss = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._kernel_peak = False
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, current_rss())
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = current_rss()
+        self._kernel_peak = _reset_peak_rss()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._sampler.join()
+        self.end_rss = current_rss()
+        self.peak_rss = max(self.peak_rss, self.end_rss)
+        if self._kernel_peak:
+            self.peak_rss = max(self.peak_rss, _peak_rss() or 0)
+        return False
+
+    def report(self) -> Dict[str, float]:
+        return {
+            'start_mb': round(self.start_rss / MB, 1),
+            'end_mb': round(self.end_rss / MB, 1),
+            'peak_mb': round(self.peak_rss / MB, 1),
+        }
+
+
+def track_memory(handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]) -> Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Wrap stage handlers so each run records its memory high-water mark in the
+    item under 'memory' and logs it.
+    """
+    def tracked(stage, handler):
+        def run(item):
+            with MemoryWatch() as watch:
+                item = handler(item)
+            report = watch.report()
+            item.setdefault('memory', {})[stage] = report
+            logger.info(f"Stage {stage}: peak RSS {report['peak_mb']:.0f} MB "
+                        f"({report['start_mb']:.0f} MB -> {report['end_mb']:.0f} MB)")
+            return item
+        return run
+    return {stage: tracked(stage, handler) for stage, handler in handlers.items()}
+
+
+class RecyclePolicy:
+    """
+    Decide when a long-running worker should be replaced: after max_jobs jobs
+    or once its resident memory exceeds max_rss_mb at the end of a job.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, max_rss_mb: Optional[float] = None):
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.jobs = 0
+        self.triggered = False
+
+    def job_done(self):
+        self.jobs += 1
+
+    def should_recycle(self) -> bool:
+        if self.max_jobs and self.jobs >= self.max_jobs:
+            logger.info(f"Worker {os.getpid()} recycling after {self.jobs} job(s)")
+            self.triggered = True
+        elif self.max_rss_mb and current_rss() > self.max_rss_mb * MB:
+            logger.info(f"Worker {os.getpid()} recycling at {current_rss() / MB:.0f} MB RSS "
+                        f"(limit {self.max_rss_mb:.0f} MB)")
+            self.triggered = True
+        return self.triggered
+
+
+def _run_child(target: Callable[..., int], args: Sequence[Any]):
+    sys.exit(target(*args))
+
+
+def supervise(target: Callable[..., int], slots: List[Sequence[Any]]):
+    """
+    Keep one worker process running per slot until each finishes its work.
+
+    `target(*slot_args)` runs in the child and returns its exit code: 0 when
+    there is no more work, RECYCLE_EXIT_CODE to be replaced by a fresh
+    process. Workers that die (e.g. killed for running out of memory) are
+    restarted too. Processes are forked where the platform supports it, so
+    models loaded in the supervisor before calling this are inherited warm by
+    every worker instead of being loaded again.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    started_at = {}
+
+    def start(slot):
+        process = context.Process(target=_run_child, args=(target, slots[slot]), name=f"worker-{slot}")
+        process.start()
+        started_at[slot] = time.monotonic()
+        return process
+
+    running = {slot: start(slot) for slot in range(len(slots))}
+    crashes = {slot: 0 for slot in range(len(slots))}
+    while running:
+        sentinels = {process.sentinel: slot for slot, process in running.items()}
+        for sentinel in multiprocessing.connection.wait(list(sentinels)):
+            slot = sentinels[sentinel]
+            process = running.pop(slot)
+            process.join()
+            if process.exitcode == 0:
+                logger.info(f"Worker {process.pid} (slot {slot}) finished")
+            elif process.exitcode == RECYCLE_EXIT_CODE:
+                crashes[slot] = 0
+                running[slot] = start(slot)
+                logger.info(f"Recycled worker {process.pid} (slot {slot}) as {running[slot].pid}")
+            else:
+                # Occasional crashes of long-running workers (e.g. OOM kills
+                # hours apart) are not a crash loop
+                if time.monotonic() - started_at[slot] >= HEALTHY_RUN_SECONDS:
+                    crashes[slot] = 0
+                crashes[slot] += 1
+                if crashes[slot] >= MAX_CONSECUTIVE_CRASHES:
+                    logger.error(f"Worker slot {slot} crashed {crashes[slot]} times in a row; giving up on it")
+                    continue
+                logger.warning(f"Worker {process.pid} (slot {slot}) died with exit code {process.exitcode}; restarting")
+                time.sleep(RESTART_DELAY)
+                running[slot] = start(slot)
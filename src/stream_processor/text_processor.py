@@ -1,28 +1,105 @@
 import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+CHUNK_CHARS = 4000
+READ_SIZE = 1 << 20
+PREVIEW_CHARS = 1000
+
+# Preferred split points, best first
+BOUNDARIES = ("\n\n", ". ", "! ", "? ", "\n", " ")
+
+def _find_boundary(text: str, start: int, end: int) -> int:
+    """
+    Find the best split point in text[start:end], preferring paragraph and
+    sentence breaks in the second half of the window.
+    """
+    for separator in BOUNDARIES:
+        cut = text.rfind(separator, start + (end - start) // 2, end)
+        if cut != -1:
+            return cut + len(separator)
+    return end
+
+def _take_chunks(buffer: str, max_chars: int) -> Tuple[List[str], str]:
+    chunks = []
+    pos = 0
+    while len(buffer) - pos >= max_chars:
+        cut = _find_boundary(buffer, pos, pos + max_chars)
+        chunks.append(buffer[pos:cut])
+        pos = cut
+    return chunks, buffer[pos:]
+
+def split_text(text: str, max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Split text into chunks of at most max_chars at paragraph/sentence boundaries.
+    """
+    chunks, rest = _take_chunks(text, max_chars)
+    for chunk in chunks + [rest]:
+        if chunk.strip():
+            yield chunk.strip()
+
+def iter_text_chunks(file_path: Path, max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Read a local text file incrementally and yield chunks of at most max_chars,
+    split at paragraph/sentence boundaries. Only about READ_SIZE characters are
+    held in memory at a time, whatever the size of the file.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        rest = ""
+        for block in iter(lambda: f.read(READ_SIZE), ''):
+            chunks, rest = _take_chunks(rest + block, max_chars)
+            for chunk in chunks:
+                if chunk.strip():
+                    yield chunk.strip()
+        if rest.strip():
+            yield rest.strip()
+
+def read_preview(file_path: Path, length: int = PREVIEW_CHARS) -> str:
+    """
+    Return the start of a text file, with an ellipsis if it is longer than length.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        text = f.read(length + 1)
+    return text[:length] + "..." if len(text) > length else text
+
+def iter_source_chunks(text_info: dict, max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Yield the content described by process_text() in chunks, streaming local files from disk.
+    """
+    if text_info['path']:
+        return iter_text_chunks(Path(text_info['path']), max_chars)
+    return split_text(text_info['content'], max_chars)
 
 def process_text(url_or_path: str, output_dir: Path):
     """
     Process text content from a URL or local file.
+
+    Web pages are fetched into 'content'. Local files are not read here: 'path'
+    points at them and iter_source_chunks() streams them chunk by chunk.
     """
+    path: Optional[str] = None
+    content: Optional[str] = None
     if url_or_path.startswith(('http://', 'https://')):
         # It's a URL
         response = requests.get(url_or_path)
         soup = BeautifulSoup(response.text, 'html.parser')
         title = soup.title.string if soup.title else "Untitled"
         content = ' '.join([p.text for p in soup.find_all('p')])
+        preview = content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
     else:
         # It's a local file
         file_path = Path(url_or_path)
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {url_or_path}")
         title = file_path.stem
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        path = str(file_path)
+        preview = read_preview(file_path)
 
     return {
         'title': title,
         'content': content,
+        'path': path,
+        'preview': preview,
         'url': url_or_path
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, stage);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _serializable(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Keys starting with an underscore hold transient, process-local state
+    return {key: value for key, value in payload.items() if not key.startswith('_')}
+
+
+class WorkQueue:
+    """
+    Coordinator-free work queue on a shared SQLite file.
+
+    Jobs move through named stages. A worker claims a pending job in one of the
+    stages it handles and holds a lease on it, which it renews with heartbeats
+    while working. Leases of workers that die expire and the job becomes
+    claimable again, until it has been attempted max_attempts times.
+
+    The database may live on shared storage (NFS, SMB); it uses SQLite's default
+    rollback journal and BEGIN IMMEDIATE transactions, which only rely on file
+    locking being honoured by the filesystem.
+    """
+
+    def __init__(self, db_path: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, payload: Dict[str, Any], stage: str) -> int:
+        def work(conn):
+            cursor = conn.execute(
+                "INSERT INTO jobs (stage, payload, updated_at) VALUES (?, ?, ?)",
+                (stage, json.dumps(_serializable(payload), ensure_ascii=False), time.time()),
+            )
+            return cursor.lastrowid
+        return self._transaction(work)
+
+    def _requeue_expired(self, conn, now):
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = CASE WHEN attempts >= ? THEN 'lease expired' ELSE error END, "
+            "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, self.max_attempts, now, now),
+        )
+
+    def claim(self, worker_id: str, stages: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest pending job in one of the given stages, or return None.
+        """
+        def work(conn):
+            now = time.time()
+            self._requeue_expired(conn, now)
+            placeholders = ",".join("?" * len(stages))
+            row = conn.execute(
+                f"SELECT id, stage, payload, attempts FROM jobs "
+                f"WHERE status = 'pending' AND stage IN ({placeholders}) ORDER BY id LIMIT 1",
+                list(stages),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, stage, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, job_id),
+            )
+            return {'id': job_id, 'stage': stage, 'payload': json.loads(payload), 'attempts': attempts + 1}
+        return self._transaction(work)
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """
+        Extend a lease. Returns False if the lease has been lost to another worker.
+        """
+        def work(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+        return self._transaction(work)
+
+    def complete(self, job_id: int, worker_id: str, payload: Dict[str, Any],
+                 next_stage: Optional[str] = None) -> bool:
+        """
+        Finish the current stage of a job, moving it to next_stage or marking it done.
+        """
+        def work(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET stage = COALESCE(?, stage), status = ?, payload = ?, attempts = 0, "
+                "lease_owner = NULL, lease_expires = NULL, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (next_stage, 'pending' if next_stage else 'done',
+                 json.dumps(_serializable(payload), ensure_ascii=False), time.time(), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+        return self._transaction(work)
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """
+        Release a job after an error; it is retried until max_attempts is reached.
+        """
+        def work(conn):
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, error, time.time(), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+        return self._transaction(work)
+
+    def job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, stage, status, payload, attempts, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, stage, status, payload, attempts, error = row
+        return {'id': job_id, 'stage': stage, 'status': status, 'payload': json.loads(payload),
+                'attempts': attempts, 'error': error}
+
+    def unfinished(self) -> int:
+        """
+        Number of jobs that are pending or leased in any stage.
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0]
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Number of jobs per stage and status.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT stage, status, COUNT(*) FROM jobs GROUP BY stage, status").fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for stage, status, count in rows:
+            counts.setdefault(stage, {})[status] = count
+        return counts
+
+
+def _keep_alive(queue: WorkQueue, job_id: int, worker_id: str, stop: threading.Event):
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.heartbeat(job_id, worker_id):
+            logger.warning(f"Lease on job {job_id} was lost; its result will be discarded")
+            return
+
+
+def process_job(queue: WorkQueue, job: Dict[str, Any], handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]],
+                stage_order: Sequence[str], worker_id: str) -> bool:
+    """
+    Run the handler for a claimed job's stage while heartbeating its lease.
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_keep_alive, args=(queue, job['id'], worker_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        payload = handlers[job['stage']](job['payload'])
+    except Exception as e:
+        logger.error(f"Job {job['id']} failed in stage {job['stage']}: {str(e)}")
+        queue.fail(job['id'], worker_id, f"{type(e).__name__}: {e}")
+        return False
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    position = list(stage_order).index(job['stage'])
+    next_stage = stage_order[position + 1] if position + 1 < len(stage_order) else None
+    return queue.complete(job['id'], worker_id, payload, next_stage)
+
+
+def run_worker(queue: WorkQueue, handlers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]],
+               stage_order: Sequence[str], stages: Optional[List[str]] = None, worker_id: Optional[str] = None,
+               max_jobs: Optional[int] = None, exit_when_idle: bool = False,
+               poll_interval: float = POLL_INTERVAL,
+               before_job: Optional[Callable[[Dict[str, Any]], Any]] = None,
+               after_job: Optional[Callable[[Dict[str, Any]], Any]] = None,
+               should_stop: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Claim and process jobs in the given stages (default: all) until stopped.
+
+    Returns the number of jobs processed. The worker exits after max_jobs jobs,
+    or, when exit_when_idle is set, once every job in the queue is done or failed.
+    `before_job` and `after_job` are called with each claimed job around its
+    processing, and the worker also exits after a job if `should_stop` returns
+    True.
+    """
+    stages = list(stages or stage_order)
+    worker_id = worker_id or default_worker_id()
+    logger.info(f"Worker {worker_id} handling stages: {', '.join(stages)}")
+
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id, stages)
+        if job is None:
+            if exit_when_idle and queue.unfinished() == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"Worker {worker_id} processing job {job['id']} ({job['stage']}, attempt {job['attempts']})")
+        if before_job:
+            before_job(job)
+        try:
+            process_job(queue, job, handlers, stage_order, worker_id)
+        finally:
+            if after_job:
+                after_job(job)
+        processed += 1
+        if should_stop and should_stop():
+            break
+    return processed
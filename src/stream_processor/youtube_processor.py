@@ -1,15 +1,13 @@
 import yt_dlp
 from pathlib import Path
-import time
 from openai import OpenAI
-import json
 from functools import lru_cache
 import os
 from datetime import datetime
 import logging
-from typing import Dict, Any
-import asyncio
+from typing import Dict, Any, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential
+from .llm import DESCRIPTION_TOKENS, dedupe_tags, extractive_excerpt, stream_chat_completion, truncate_to_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,88 +18,104 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @lru_cache(maxsize=100)
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def get_video_info(url: str) -> Dict[str, Any]:
+def get_video_info(url: str) -> Dict[str, Any]:
     """
     Get detailed video information with caching to avoid redundant API calls.
     """
     ydl_opts = {
         'quiet': True,
         'skip_download': True,
-        'force_generic_extractor': True,
-        'extract_flat': True,
         'no_warnings': True,
     }
+    ydl = yt_dlp.YoutubeDL(ydl_opts)
     try:
-        async with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = await ydl.extract_info(url, download=False)
-            return {
-                'title': info.get('title', 'unknown_title'),
-                'channel': info.get('uploader', 'unknown_channel'),
-                'video_id': info.get('id', 'unknown_id'),
-                'description': info.get('description', ''),
-                'view_count': info.get('view_count', 0),
-                'like_count': info.get('like_count', 0),
-                'duration': info.get('duration', 0),
-                'upload_date': info.get('upload_date', ''),
-                'tags': info.get('tags', []),
-                'url': url,
-            }
+        info = ydl.extract_info(url, download=False)
+        return {
+            'title': info.get('title', 'unknown_title'),
+            'channel': info.get('uploader', 'unknown_channel'),
+            'video_id': info.get('id', 'unknown_id'),
+            'description': info.get('description', ''),
+            'view_count': info.get('view_count', 0),
+            'like_count': info.get('like_count', 0),
+            'duration': info.get('duration', 0),
+            'upload_date': info.get('upload_date', ''),
+            'tags': info.get('tags', []),
+            'url': url,
+        }
     except Exception as e:
         logger.error(f"Error fetching video info: {str(e)}")
         raise
-
-async def process_youtube(url: str, output_dir: Path) -> Dict[str, Any]:
+    finally:
+        ydl.close()
+
+# Whisper resamples everything to 16 kHz mono, so the smallest audio-only
+# stream of at least this bitrate and sample rate is as good as the best one
+MIN_AUDIO_BITRATE = 32
+MIN_SAMPLE_RATE = 16000
+AUDIO_FORMAT = (
+    f"wa[abr>={MIN_AUDIO_BITRATE}][asr>={MIN_SAMPLE_RATE}]"
+    f"/wa[abr>={MIN_AUDIO_BITRATE}]"
+    # Audio-only streams whose bitrate is unknown: still the smallest one
+    "/wa"
+    # Without audio-only streams, the smallest stream that carries audio
+    "/wa*/w"
+)
+CONCURRENT_FRAGMENTS = 4
+
+def audio_download_options(output_dir: Path, file_stem: str = "temp_audio") -> Dict[str, Any]:
     """
-    Download audio from a YouTube video and generate a rich summary.
+    yt-dlp options that fetch the lowest-bitrate audio stream adequate for
+    speech recognition and keep it in its original container; it is decoded
+    directly at transcription time instead of being re-encoded to WAV.
     """
-    audio_file = output_dir / "temp_audio.wav"
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'wav',
-            'preferredquality': '192',
-        }],
-        'outtmpl': str(audio_file.with_suffix('')),
+    return {
+        'format': AUDIO_FORMAT,
+        'outtmpl': str(output_dir / f"{file_stem}.%(ext)s"),
+        'concurrent_fragment_downloads': CONCURRENT_FRAGMENTS,
         'quiet': True,
         'no_warnings': True,
         'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     }
-    
+
+def download_audio(url: str, output_dir: Path, file_stem: str = "temp_audio") -> Path:
+    """
+    Download the audio track of a YouTube video.
+    """
     try:
-        async with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            await ydl.download([url])
+        with yt_dlp.YoutubeDL(audio_download_options(output_dir, file_stem)) as ydl:
+            info = ydl.extract_info(url, download=True)
+            audio_file = Path(ydl.prepare_filename(info))
     except Exception as e:
         logger.error(f"Error downloading video: {str(e)}")
         raise
-    
-    video_info = await get_video_info(url)
-    summary = await generate_rich_summary(video_info)
-    metadata = generate_metadata(video_info)
-    
-    return {
-        'audio_file': audio_file,
-        'summary': summary,
-        'metadata': metadata
-    }
+
+    logger.info(f"Downloaded {info.get('format_id')} ({info.get('abr')} kbps {info.get('acodec')}) to {audio_file}")
+    return audio_file
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def generate_rich_summary(video_info: Dict[str, Any]) -> str:
+async def generate_rich_summary(video_info: Dict[str, Any], transcript: Optional[str] = None,
+                                section_file: Optional[Path] = None, stats: Optional[Dict[str, Any]] = None) -> str:
     """
     Generate a rich summary of the video using OpenAI's GPT-4 model.
+
+    The description and tags are trimmed to a token budget, and an extractive
+    excerpt of the transcript is added when one is given. The response is
+    streamed into section_file; token counts and timings go into stats.
     """
+    excerpt = extractive_excerpt(transcript) if transcript else ""
+    excerpt_section = f"\n    Trecho da transcrição:\n    {excerpt}\n" if excerpt else ""
     prompt = f"""
     Gere um resumo detalhado e envolvente do seguinte vídeo do YouTube em português do Brasil:
 
     Título: {video_info['title']}
     Canal: {video_info['channel']}
-    Descrição: {video_info['description']}
+    Descrição: {truncate_to_tokens(video_info['description'] or '', DESCRIPTION_TOKENS)}
     Visualizações: {video_info['view_count']}
     Likes: {video_info['like_count']}
     Duração: {video_info['duration']} segundos
     Data de upload: {video_info['upload_date']}
-    Tags: {', '.join(video_info['tags'])}
-
+    Tags: {', '.join(dedupe_tags(video_info['tags'] or []))}
+{excerpt_section}
     Por favor, inclua os seguintes elementos no formato Markdown:
 
     1. ## Visão Geral
@@ -128,22 +142,20 @@ async def generate_rich_summary(video_info: Dict[str, Any]) -> str:
     Faça o resumo envolvente, informativo e com cerca de 400-500 palavras. Use formatação Markdown para melhorar a legibilidade.
     """
 
+    messages = [
+        {"role": "system", "content": "Você é um assistente especializado em criar resumos detalhados e envolventes de vídeos do YouTube em português do Brasil."},
+        {"role": "user", "content": prompt}
+    ]
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um assistente especializado em criar resumos detalhados e envolventes de vídeos do YouTube em português do Brasil."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            n=1,
-            temperature=0.7,
-        )
-        return response.choices[0].message.content.strip()
+        result = stream_chat_completion(client, messages, section_file, model="gpt-4", max_tokens=1000, n=1, temperature=0.7)
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}")
         raise
 
+    if stats is not None:
+        stats.update(result['stats'])
+    return result['text']
+
 def generate_metadata(video_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     Generate metadata for the processed video.
@@ -159,14 +171,3 @@ def generate_metadata(video_info: Dict[str, Any]) -> Dict[str, Any]:
         "processing_date": datetime.now().isoformat(),
         "tags": video_info['tags'],
     }
-
-# Example usage
-if __name__ == "__main__":
-    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
-    output_dir = Path("./output")
-    audio_file, summary, metadata = asyncio.run(process_youtube(url, output_dir))
-    print(f"Audio file saved as: {audio_file}")
-    print("\nVideo Summary:")
-    print(summary)
-    print("\nMetadata:")
-    print(json.dumps(metadata, indent=2))
\ No newline at end of file
@@ -0,0 +1,65 @@
+from src.stream_processor.cascade import needs_redecode, low_confidence_spans, merge_segments, redecode_windows, drop_covered
+
+def segment(start, end, text, avg_logprob=-0.2, compression_ratio=1.5, no_speech_prob=0.01):
+    return {'start': start, 'end': end, 'text': text, 'avg_logprob': avg_logprob,
+            'compression_ratio': compression_ratio, 'no_speech_prob': no_speech_prob}
+
+def test_needs_redecode():
+    assert not needs_redecode(segment(0, 5, ' fine'))
+    assert needs_redecode(segment(0, 5, ' unsure', avg_logprob=-1.3))
+    assert needs_redecode(segment(0, 5, ' la la la la', compression_ratio=3.1))
+    # Probably silence: not worth a second pass
+    assert not needs_redecode(segment(0, 5, '', avg_logprob=-1.5, no_speech_prob=0.9))
+    # Reused segments carry no decoding statistics
+    assert not needs_redecode({'start': 0, 'end': 5, 'text': ' reused'})
+
+def test_low_confidence_spans_merge_neighbours():
+    segments = [
+        segment(0, 5, ' a'),
+        segment(5, 10, ' b', avg_logprob=-1.4),
+        segment(10, 15, ' c', avg_logprob=-1.2),
+        segment(15, 30, ' d'),
+        segment(30, 35, ' e', compression_ratio=2.8),
+    ]
+
+    assert low_confidence_spans(segments, duration=35) == [(4.5, 15.5), (29.5, 35)]
+
+def test_redecode_windows_pack_short_spans():
+    spans = [(10, 12), (20, 25), (36, 38), (100, 140)]
+
+    # The first three fit in one 30 s window; the long span stays on its own
+    assert redecode_windows(spans, [(0, 600)]) == [(10, 38), (100, 140)]
+
+def test_redecode_windows_fall_back_to_full_pass():
+    # Scattered spans needing 5 windows cost more than half of the 8-window full pass
+    spans = [(i * 45.0, i * 45.0 + 2) for i in range(5)]
+
+    assert redecode_windows(spans, [(0.0, 240)]) == [(0.0, 240)]
+    assert redecode_windows(spans[:2], [(0.0, 240)]) == [(0.0, 2.0), (45.0, 47.0)]
+
+def test_redecode_windows_stay_inside_transcribed_regions():
+    # 0-60 s was reused from a fingerprint match; only 60-300 s was transcribed
+    spans = [(59.5, 63), (70, 72), (200, 205)]
+
+    assert redecode_windows(spans, [(60.0, 300.0)]) == [(60.0, 72), (200, 205)]
+    # Scattered spans fall back to re-decoding the transcribed region, not the whole file
+    scattered = [(60 + i * 45.0, 62 + i * 45.0) for i in range(5)]
+    assert redecode_windows(scattered, [(60.0, 300.0)]) == [(60.0, 300.0)]
+
+def test_drop_covered():
+    reused = [{'start': 0.0, 'end': 60.0, 'text': ' reused'}]
+    redecoded = [{'start': 58.0, 'end': 61.0, 'text': ' overlap'}, {'start': 60.0, 'end': 65.0, 'text': ' new'}]
+
+    assert [s['text'] for s in drop_covered(redecoded, reused)] == [' new']
+
+def test_merge_segments_replaces_only_redecoded_spans():
+    segments = [segment(0, 5, ' a'), segment(5, 10, ' b?'), segment(10, 15, ' c')]
+    redecoded = [((4.5, 10.5), [
+        {'start': 4.5, 'end': 10.0, 'text': ' b!'},
+        # Picked up from the padding after the span; ' c' already covers it
+        {'start': 10.0, 'end': 11.0, 'text': ' c-'},
+    ])]
+
+    merged = merge_segments(segments, redecoded)
+
+    assert [s['text'] for s in merged] == [' a', ' b!', ' c']
@@ -0,0 +1,112 @@
+import time
+import pytest
+import numpy as np
+from src.stream_processor.fingerprint import FingerprintIndex, compute_fingerprint, uncovered_spans, MAX_PEAKS_PER_SECOND, SAMPLE_RATE
+
+def make_audio(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    # A sequence of random tones, changing every 250ms, over a little noise
+    freqs = rng.uniform(200, 4000, size=int(seconds * 4) + 1)
+    tone = np.sin(2 * np.pi * freqs[(t * 4).astype(int)] * t)
+    return (tone + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+@pytest.fixture
+def index(tmp_path):
+    index = FingerprintIndex(tmp_path / "fingerprints.db")
+    yield index
+    index.close()
+
+def store(index, audio, segments):
+    hashes, offsets = compute_fingerprint(audio)
+    return index.add("original", hashes, offsets, len(audio) / SAMPLE_RATE, segments)
+
+def lookup(index, audio):
+    hashes, offsets = compute_fingerprint(audio)
+    return index.lookup(hashes, offsets, len(audio) / SAMPLE_RATE)
+
+def test_duplicate_reuses_transcript(index):
+    audio = make_audio(60)
+    segments = [{'start': 0.0, 'end': 30.0, 'text': ' First.'}, {'start': 30.0, 'end': 60.0, 'text': ' Second.'}]
+    recording_id = store(index, audio, segments)
+
+    # Same audio with a bit of extra noise, as after a re-encode
+    noisy = audio + 0.02 * np.random.default_rng(1).standard_normal(len(audio)).astype(np.float32)
+    match = lookup(index, noisy)
+
+    assert match['recording_id'] == recording_id
+    assert match['kind'] == 'duplicate'
+    assert [s['text'] for s in match['segments']] == [' First.', ' Second.']
+
+def test_clip_of_longer_recording_is_duplicate(index):
+    audio = make_audio(120)
+    segments = [{'start': i * 20.0, 'end': (i + 1) * 20.0, 'text': f' Part {i}.'} for i in range(6)]
+    store(index, audio, segments)
+
+    match = lookup(index, audio[40 * SAMPLE_RATE:80 * SAMPLE_RATE])
+
+    assert match['kind'] == 'duplicate'
+    assert [s['text'] for s in match['segments']] == [' Part 2.', ' Part 3.']
+    assert match['segments'][0]['start'] == pytest.approx(0.0, abs=0.1)
+
+def test_clip_off_segment_boundaries_leaves_edges_uncovered(index):
+    audio = make_audio(120)
+    segments = [{'start': i * 20.0, 'end': (i + 1) * 20.0, 'text': f' Part {i}.'} for i in range(6)]
+    store(index, audio, segments)
+
+    match = lookup(index, audio[45 * SAMPLE_RATE:85 * SAMPLE_RATE])
+
+    assert match['kind'] == 'duplicate'
+    # Parts 2 and 4 only partly overlap the clip, so their text is not reused
+    assert [s['text'] for s in match['segments']] == [' Part 3.']
+    assert match['segments'][0]['start'] == pytest.approx(15.0, abs=0.1)
+    gaps = uncovered_spans(match['segments'], 40.0, min_seconds=1.0)
+    assert [(round(a), round(b)) for a, b in gaps] == [(0, 15), (35, 40)]
+
+def test_uncovered_spans():
+    segments = [{'start': 2.0, 'end': 5.0}, {'start': 5.2, 'end': 9.0}, {'start': 20.0, 'end': 25.0}]
+
+    assert uncovered_spans(segments, 30.0, min_seconds=1.0) == [(0.0, 2.0), (9.0, 20.0), (25.0, 30.0)]
+    assert uncovered_spans([], 10.0) == [(0.0, 10.0)]
+    assert uncovered_spans([{'start': 0.0, 'end': 10.0}], 10.0) == []
+
+def test_fingerprint_is_sparse():
+    hashes, _ = compute_fingerprint(make_audio(60))
+
+    assert len(hashes) / 60 <= MAX_PEAKS_PER_SECOND * 5
+
+def test_lookup_cost_does_not_grow_with_index(index):
+    target = make_audio(30, seed=1000)
+    recording_id = store(index, target, [{'start': 0.0, 'end': 30.0, 'text': ' Target.'}])
+    clip = target[5 * SAMPLE_RATE:25 * SAMPLE_RATE]
+
+    def timed_lookup():
+        started = time.perf_counter()
+        match = lookup(index, clip)
+        return match, time.perf_counter() - started
+
+    _, small_index_time = timed_lookup()
+    # 50 more minutes of unrelated recordings
+    for seed in range(100):
+        store(index, make_audio(30, seed=seed), [{'start': 0.0, 'end': 30.0, 'text': ' Other.'}])
+    match, large_index_time = timed_lookup()
+
+    assert match['recording_id'] == recording_id
+    assert large_index_time < max(0.5, 10 * small_index_time)
+
+def test_partial_match_returns_overlapping_segments(index):
+    audio = make_audio(60)
+    segments = [{'start': i * 10.0, 'end': (i + 1) * 10.0, 'text': f' Part {i}.'} for i in range(6)]
+    store(index, audio, segments)
+
+    extended = np.concatenate([audio, make_audio(60, seed=2)])
+    match = lookup(index, extended)
+
+    assert match['kind'] == 'partial'
+    assert len(match['segments']) == 6
+    assert match['end'] < 70
+
+def test_unrelated_audio_does_not_match(index):
+    store(index, make_audio(60), [{'start': 0.0, 'end': 60.0, 'text': ' Text.'}])
+
+    assert lookup(index, make_audio(60, seed=3)) is None
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from src.stream_processor.llm import count_tokens, dedupe_tags, extractive_excerpt, stream_chat_completion, truncate_to_tokens
+
+
+def chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+def test_truncate_to_tokens():
+    text = " ".join(f"palavra{i}" for i in range(500))
+    truncated = truncate_to_tokens(text, 50)
+
+    assert count_tokens(truncated) <= 51
+    assert truncated.endswith("...")
+    assert text.startswith(truncated[:-3])
+    assert truncate_to_tokens("curto", 50) == "curto"
+
+
+def test_dedupe_tags():
+    tags = ["Python", "python", " PYTHON ", "Machine  Learning", "machine learning", "AI", ""]
+
+    assert dedupe_tags(tags) == ["Python", "Machine  Learning", "AI"]
+
+    kept = dedupe_tags([f"tag{i}" for i in range(100)], max_tokens=10)
+    assert 0 < len(kept) < 100
+    assert kept == [f"tag{i}" for i in range(len(kept))]
+    assert sum(count_tokens(tag) + 1 for tag in kept) <= 10
+
+
+def test_extractive_excerpt_keeps_central_sentences_in_order():
+    transcript = (
+        "Hoje falamos sobre redes neurais. "
+        "O tempo estava bom ontem. "
+        "Redes neurais aprendem com dados e redes neurais profundas aprendem mais. "
+        "Obrigado por assistir."
+    )
+    excerpt = extractive_excerpt(transcript, max_tokens=30)
+
+    assert "redes neurais" in excerpt
+    assert "tempo estava bom" not in excerpt
+    assert excerpt.index("Hoje") < excerpt.index("profundas")
+    assert count_tokens(excerpt) <= 30
+    assert extractive_excerpt("") == ""
+
+
+def test_stream_chat_completion_writes_section_and_records_usage(tmp_path):
+    client = MagicMock()
+    client.chat.completions.create.return_value = iter([
+        chunk("## Visão"), chunk(" Geral\n"), chunk(""), chunk("Texto."),
+        chunk(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=7)),
+    ])
+    section_file = tmp_path / "resumo.md"
+
+    result = stream_chat_completion(client, [{"role": "user", "content": "oi"}], section_file, model="gpt-4")
+
+    assert result['text'] == "## Visão Geral\nTexto."
+    assert section_file.read_text(encoding="utf-8") == "## Visão Geral\nTexto."
+    assert result['stats']['prompt_tokens'] == 120
+    assert result['stats']['completion_tokens'] == 7
+    assert result['stats']['time_to_first_token'] is not None
+    assert result['stats']['model'] == "gpt-4"
+    kwargs = client.chat.completions.create.call_args.kwargs
+    assert kwargs['stream'] is True
+    assert kwargs['stream_options'] == {"include_usage": True}
+
+
+def test_stream_chat_completion_counts_tokens_without_usage():
+    client = MagicMock()
+    client.chat.completions.create.return_value = iter([chunk("resposta curta")])
+
+    result = stream_chat_completion(client, [{"role": "user", "content": "pergunta"}])
+
+    assert result['stats']['prompt_tokens'] == count_tokens("pergunta")
+    assert result['stats']['completion_tokens'] == count_tokens("resposta curta")
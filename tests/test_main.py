@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock, patch
+import numpy as np
+from src.stream_processor.main import QUEUE_STAGE_HANDLERS, new_item, stage_llm_summary, transcribe_audio_segments
+
+STATS = {'prompt_tokens': 100, 'completion_tokens': 20, 'time_to_first_token': 0.5}
+
+def spotify_item(tmp_path, **fields):
+    item = {
+        'kind': 'spotify',
+        'output_dir': str(tmp_path),
+        'title': 'Episode',
+        'info': {'type': 'episode', 'name': 'Episode'},
+        'audio_file': None,
+    }
+    item.update(fields)
+    return item
+
+def fake_summary(spotify_info, transcript, section_file, stats):
+    stats.update(STATS)
+    return 'Resumo'
+
+def test_llm_summary_skips_placeholder_transcript_without_audio(tmp_path):
+    item = spotify_item(tmp_path, transcript="Audio não disponível para transcrição.", segments=[])
+
+    with patch('src.stream_processor.main.generate_spotify_summary', side_effect=fake_summary) as summary:
+        item = stage_llm_summary(item)
+
+    assert summary.call_args.args[1] is None
+    assert item['llm_summary'] == 'Resumo'
+    assert item['llm_stats'] == STATS
+
+def test_llm_summary_passes_transcript_with_segments(tmp_path):
+    item = spotify_item(tmp_path, transcript=" Olá.", segments=[{'start': 0.0, 'end': 1.0, 'text': ' Olá.'}])
+
+    with patch('src.stream_processor.main.generate_spotify_summary', side_effect=fake_summary) as summary:
+        stage_llm_summary(item)
+
+    assert summary.call_args.args[1] == " Olá."
+
+def test_new_item_stores_absolute_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    item = new_item("notes.txt", "./out")
+
+    assert item['kind'] == 'text'
+    assert item['url'] == str(tmp_path.resolve() / "notes.txt")
+    assert item['output_dir'] == str(tmp_path.resolve() / "out")
+    assert new_item("https://example.com/page", "./out")['url'] == "https://example.com/page"
+
+def test_queue_decode_stage_does_not_decode(tmp_path):
+    audio_file = tmp_path / "audio.m4a"
+    audio_file.write_bytes(b"audio")
+    item = {'kind': 'youtube', 'audio_file': str(audio_file)}
+
+    with patch('src.stream_processor.main.whisper.load_audio') as load_audio:
+        item = QUEUE_STAGE_HANDLERS['decode'](item)
+
+    load_audio.assert_not_called()
+    assert '_audio' not in item
+
+class FakeWhisper:
+    """Emits one segment per 10 s of the audio it is given, tagged with its name."""
+
+    def __init__(self, name, avg_logprob):
+        self.name = name
+        self.avg_logprob = avg_logprob
+        self.calls = []
+
+    def transcribe(self, audio, fp16=False, **options):
+        length = len(audio) / 16000
+        self.calls.append(length)
+        return {'segments': [
+            {'start': start, 'end': min(start + 10.0, length), 'text': f' {self.name}',
+             'avg_logprob': self.avg_logprob, 'compression_ratio': 1.0, 'no_speech_prob': 0.0}
+            for start in np.arange(0.0, length, 10.0)
+        ]}
+
+def test_cascade_after_partial_match_only_redecodes_transcribed_gap(tmp_path):
+    audio_file = tmp_path / "audio.m4a"
+    audio_file.write_bytes(b"audio")
+    # The first 60 s of this 120 s file match a stored recording
+    reused = [{'start': i * 10.0, 'end': (i + 1) * 10.0, 'text': f' R{i}'} for i in range(6)]
+    index = MagicMock()
+    index.lookup.return_value = {'kind': 'partial', 'source': 'stored', 'segments': reused}
+    models = {'small': FakeWhisper('small', avg_logprob=-1.5), 'medium': FakeWhisper('medium', avg_logprob=-0.1)}
+
+    with patch('src.stream_processor.main.compute_fingerprint', return_value=(np.zeros(0), np.zeros(0))), \
+         patch('src.stream_processor.main.load_whisper_model', side_effect=models.get):
+        result = transcribe_audio_segments(audio_file, 'small', index, audio=np.zeros(120 * 16000, dtype=np.float32),
+                                           cascade_model='medium')
+
+    texts = [s['text'] for s in result['segments']]
+    assert texts[:6] == [f' R{i}' for i in range(6)]
+    assert all(text == ' medium' for text in texts[6:])
+    assert all(s['start'] >= 60.0 for s in result['segments'][6:])
+    # The larger model never decodes more than the 60 s gap
+    assert sum(models['medium'].calls) <= 60.0
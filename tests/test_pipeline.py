@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+from src.stream_processor.pipeline import Pipeline, parse_concurrency
+
+STAGES = ("fetch", "compute", "store")
+
+def make_handlers(log, delay=0.0):
+    def handler(stage):
+        def run(item):
+            log.append((stage, item['n'], time.perf_counter()))
+            time.sleep(delay)
+            item.setdefault('stages', []).append(stage)
+            return item
+        return run
+    return {stage: handler(stage) for stage in STAGES}
+
+def test_all_items_pass_through_every_stage():
+    log = []
+    results = Pipeline(STAGES, make_handlers(log), report_interval=None).run({'n': n} for n in range(10))
+
+    assert sorted(item['n'] for item in results) == list(range(10))
+    assert all(item['stages'] == list(STAGES) for item in results)
+
+def test_stages_overlap_across_items():
+    log = []
+    pipeline = Pipeline(STAGES, make_handlers(log, delay=0.05), report_interval=None)
+    started = time.perf_counter()
+    pipeline.run({'n': n} for n in range(6))
+    elapsed = time.perf_counter() - started
+
+    # Serially this would take 6 items * 3 stages * 50ms = 0.9s
+    assert elapsed < 0.6
+    # Item 1 was fetched while item 0 was still further down the pipeline
+    first_store = min(t for stage, n, t in log if stage == "store")
+    assert any(stage == "fetch" and t < first_store for stage, n, t in log if n > 0)
+
+def test_failed_items_skip_later_stages():
+    handlers = make_handlers([])
+    def compute(item):
+        if item['n'] == 2:
+            raise ValueError("bad item")
+        return item
+    handlers["compute"] = compute
+
+    pipeline = Pipeline(STAGES, handlers, concurrency={"compute": 2}, report_interval=None)
+    results = {item['n']: item for item in pipeline.run({'n': n} for n in range(4))}
+
+    assert results[2]['error'] == "compute: ValueError: bad item"
+    assert results[2]['stages'] == ["fetch"]
+    assert results[3]['stages'] == ["fetch", "store"]
+    assert pipeline.snapshot()["compute"]["failed"] == 1
+    assert pipeline.snapshot()["store"]["done"] == 3
+
+def test_bounded_queues_apply_backpressure():
+    release = threading.Event()
+    fetched = []
+    handlers = make_handlers([])
+    def fetch(item):
+        fetched.append(item['n'])
+        return item
+    def compute(item):
+        release.wait()
+        return item
+    handlers["fetch"] = fetch
+    handlers["compute"] = compute
+
+    pipeline = Pipeline(STAGES, handlers, queue_size=1, report_interval=None)
+    runner = threading.Thread(target=pipeline.run, args=([{'n': n} for n in range(20)],))
+    runner.start()
+    time.sleep(0.2)
+
+    # compute holds one item and its queue one more; fetch blocks on a third
+    assert len(fetched) <= 3
+    assert pipeline.snapshot()["compute"]["active"] == 1
+    release.set()
+    runner.join(timeout=5)
+    assert len(fetched) == 20
+
+def test_parse_concurrency():
+    assert parse_concurrency(["fetch=2,compute=4", "store=1"], STAGES) == {"fetch": 2, "compute": 4, "store": 1}
+    with pytest.raises(ValueError):
+        parse_concurrency(["unknown=2"], STAGES)
+    with pytest.raises(ValueError):
+        parse_concurrency(["fetch=0"], STAGES)
@@ -0,0 +1,73 @@
+import os
+import threading
+import pytest
+from src.stream_processor.resources import HostBudget, apply_thread_budget, core_slices, plan_thread_budget, rebalance_checkpoint
+
+def test_plan_thread_budget_splits_all_cores():
+    assert plan_thread_budget(4, cores=8) == [2, 2, 2, 2]
+    assert plan_thread_budget(3, cores=8) == [3, 3, 2]
+    assert plan_thread_budget(2, cores=8, weights=[3, 1]) == [6, 2]
+
+def test_plan_thread_budget_gives_every_worker_a_thread():
+    assert plan_thread_budget(4, cores=2) == [1, 1, 1, 1]
+    with pytest.raises(ValueError):
+        plan_thread_budget(2, cores=4, weights=[1])
+
+def test_core_slices_are_disjoint():
+    assert core_slices([2, 1, 1], cores=[0, 1, 2, 3]) == [[0, 1], [2], [3]]
+
+def test_apply_thread_budget_sets_environment(monkeypatch):
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "TOKENIZERS_PARALLELISM"):
+        monkeypatch.delenv(name, raising=False)
+
+    apply_thread_budget(3)
+
+    assert os.environ["OMP_NUM_THREADS"] == "3"
+    assert os.environ["MKL_NUM_THREADS"] == "3"
+    assert os.environ["TOKENIZERS_PARALLELISM"] == "false"
+
+def test_host_budget_shares_cores_among_busy_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.stream_processor.resources.apply_thread_budget', lambda threads: None)
+    budget = HostBudget(tmp_path / "threads.db", cores=8)
+    # Another live worker (this test's parent process) is busy
+    budget.conn.execute("INSERT INTO workers (pid, busy, updated_at) VALUES (?, 1, 0)", (os.getppid(),))
+
+    assert budget.acquire() == 4
+    budget.release()
+
+    # Once it goes idle this worker gets every core
+    budget.conn.execute("UPDATE workers SET busy = 0 WHERE pid = ?", (os.getppid(),))
+    assert budget.acquire() == 8
+    budget.close()
+
+def test_host_budget_ignores_dead_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.stream_processor.resources.apply_thread_budget', lambda threads: None)
+    budget = HostBudget(tmp_path / "threads.db", cores=8)
+    budget.conn.execute("INSERT INTO workers (pid, busy, updated_at) VALUES (?, 1, 0)", (2 ** 22 + 1,))
+
+    assert budget.acquire() == 8
+    budget.close()
+
+def test_host_budget_rebalances_at_checkpoints_on_the_job_thread(tmp_path, monkeypatch):
+    applied = []
+    monkeypatch.setattr('src.stream_processor.resources.apply_thread_budget',
+                        lambda threads: applied.append((threads, threading.current_thread())))
+    budget = HostBudget(tmp_path / "threads.db", cores=8, rebalance_interval=60)
+
+    # Starts alone with every core
+    assert budget.acquire() == 8
+    # Another worker gets busy while the job is still running
+    budget.conn.execute("INSERT INTO workers (pid, busy, updated_at) VALUES (?, 1, 0)", (os.getppid(),))
+    # Checks are rate-limited...
+    rebalance_checkpoint()
+    assert budget.threads == 8
+    # ...and once due, the new share is applied by the thread running the job
+    budget.checked_at -= 60
+    rebalance_checkpoint()
+    budget.release()
+
+    assert applied == [(8, threading.current_thread()), (4, threading.current_thread())]
+    # Outside a job checkpoints do nothing
+    rebalance_checkpoint()
+    assert len(applied) == 2
+    budget.close()
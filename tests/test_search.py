@@ -0,0 +1,75 @@
+import pytest
+from src.stream_processor.search import SearchIndex, main, split_passages
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(tmp_path / "search.db")
+    yield index
+    index.close()
+
+def test_search_transcript_segments(index):
+    index.add_document(
+        'out/video.md', 'Test Video', 'https://www.youtube.com/watch?v=test_id', 'video',
+        segments=[
+            {'start': 0.0, 'end': 5.0, 'text': ' Welcome to the show.'},
+            {'start': 5.0, 'end': 9.5, 'text': ' Today we talk about whales.'},
+        ],
+        fields={'translation': 'Hoje falamos sobre baleias.'},
+        metadata={'channel_name': 'Ocean Channel', 'tags': ['sea', 'animals']},
+    )
+
+    results = index.search('whales')
+
+    assert len(results) == 1
+    assert results[0]['title'] == 'Test Video'
+    assert results[0]['field'] == 'transcript'
+    assert results[0]['start'] == 5.0
+    assert results[0]['end'] == 9.5
+    assert '[whales]' in results[0]['snippet']
+
+def test_search_fields_and_metadata(index):
+    index.add_document('out/a.md', 'A', 'a', 'text', fields={'summary': 'Resumo sobre música brasileira'})
+    index.add_document('out/b.md', 'B', 'b', 'track', metadata={'artists': ['Someone'], 'album': 'Ocean Songs'})
+
+    assert [r['title'] for r in index.search('musica')] == ['A']
+    assert index.search('ocean', field='metadata')[0]['title'] == 'B'
+    assert index.search('ocean', field='summary') == []
+
+def test_reindexing_replaces_document(index):
+    index.add_document('out/a.md', 'A', 'a', 'text', fields={'summary': 'first version'})
+    index.add_document('out/a.md', 'A', 'a', 'text', fields={'summary': 'second version'})
+
+    assert index.search('first') == []
+    assert len(index.search('version')) == 1
+
+def test_query_syntax_is_escaped(index):
+    index.add_document('out/a.md', 'A', 'a', 'text', fields={'summary': 'rock and roll'})
+
+    assert len(index.search('rock AND "roll')) == 1
+    assert index.search('***') == []
+
+def test_split_passages():
+    text = ' '.join(['word'] * 500)
+    passages = split_passages(text, passage_length=100)
+
+    assert all(len(p) <= 100 for p in passages)
+    assert ' '.join(passages) == text
+
+def test_fields_accept_chunk_iterables(index):
+    chunks = (f'chunk number {i} mentions turtles' if i == 7 else f'chunk number {i}' for i in range(10))
+    index.add_document('out/big.md', 'Big', 'big.txt', 'text', fields={'translation': chunks})
+
+    results = index.search('turtles')
+    assert len(results) == 1
+    assert results[0]['field'] == 'translation'
+
+def test_main_reports_invalid_raw_query(tmp_path, capsys):
+    index = SearchIndex(tmp_path / "search.db")
+    index.add_document('out/note.md', 'Note', 'notes.txt', 'text', fields={'content': 'Some text.'})
+    index.close()
+
+    main(['"unbalanced', '--raw', '--output', str(tmp_path)])
+
+    output = capsys.readouterr().out
+    assert output.startswith("Invalid search query")
+    assert len(output.splitlines()) == 1
@@ -0,0 +1,91 @@
+import os
+import time
+from src.stream_processor.supervisor import (
+    MAX_CONSECUTIVE_CRASHES, MB, RECYCLE_EXIT_CODE, MemoryWatch, RecyclePolicy, current_rss, supervise, track_memory,
+)
+
+def test_current_rss_is_positive():
+    assert current_rss() > 0
+
+def test_memory_watch_reports_peak():
+    with MemoryWatch() as watch:
+        buffer = bytearray(64 * MB)
+        buffer[::4096] = b"x" * len(buffer[::4096])
+        del buffer
+
+    report = watch.report()
+    assert report['peak_mb'] >= report['start_mb'] + 50
+    assert report['peak_mb'] >= report['end_mb']
+
+def test_track_memory_records_per_stage_report():
+    handlers = track_memory({"fetch": lambda item: dict(item, fetched=True)})
+
+    item = handlers["fetch"]({'n': 1})
+
+    assert item['fetched']
+    assert set(item['memory']['fetch']) == {'start_mb', 'end_mb', 'peak_mb'}
+
+def test_recycle_policy_max_jobs():
+    policy = RecyclePolicy(max_jobs=2)
+    policy.job_done()
+    assert not policy.should_recycle()
+    policy.job_done()
+    assert policy.should_recycle()
+    assert policy.triggered
+
+def test_recycle_policy_rss_limit():
+    assert RecyclePolicy(max_rss_mb=1).should_recycle()
+    assert not RecyclePolicy(max_rss_mb=1024 * 1024).should_recycle()
+
+def _counting_worker(log_path, rounds):
+    # Each process appends its pid; the first rounds ask to be recycled
+    with open(log_path, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    with open(log_path) as f:
+        started = len(f.read().split())
+    return RECYCLE_EXIT_CODE if started < rounds else 0
+
+def test_supervise_replaces_recycled_workers(tmp_path):
+    log_path = tmp_path / "pids.txt"
+
+    supervise(_counting_worker, [(str(log_path), 3)])
+
+    pids = log_path.read_text().split()
+    assert len(pids) == 3
+    assert len(set(pids)) == 3
+
+def _crashing_worker(log_path):
+    with open(log_path, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    os._exit(1)
+
+def test_supervise_gives_up_on_crashing_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.stream_processor.supervisor.RESTART_DELAY', 0)
+    log_path = tmp_path / "pids.txt"
+
+    supervise(_crashing_worker, [(str(log_path),)])
+
+    # Started once and restarted until the crash limit was reached
+    assert len(log_path.read_text().split()) == MAX_CONSECUTIVE_CRASHES
+
+def _occasionally_crashing_worker(log_path, crashes):
+    # Runs for a while and then dies, until it has crashed `crashes` times
+    with open(log_path, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    with open(log_path) as f:
+        started = len(f.read().split())
+    if started > crashes:
+        return 0
+    time.sleep(0.3)
+    os._exit(137)
+
+def test_supervise_keeps_restarting_workers_that_ran_long_enough(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.stream_processor.supervisor.RESTART_DELAY', 0)
+    monkeypatch.setattr('src.stream_processor.supervisor.HEALTHY_RUN_SECONDS', 0.2)
+    log_path = tmp_path / "pids.txt"
+    crashes = MAX_CONSECUTIVE_CRASHES + 2
+
+    supervise(_occasionally_crashing_worker, [(str(log_path), crashes)])
+
+    # Every crash came after a healthy run, so the slot was never given up
+    assert len(log_path.read_text().split()) == crashes + 1
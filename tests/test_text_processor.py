@@ -0,0 +1,34 @@
+import pytest
+from src.stream_processor.text_processor import iter_text_chunks, split_text, process_text, iter_source_chunks
+
+def test_split_text_prefers_sentence_boundaries():
+    text = "First sentence here. Second sentence here. Third sentence here."
+    chunks = list(split_text(text, max_chars=30))
+
+    assert chunks == ["First sentence here.", "Second sentence here.", "Third sentence here."]
+
+def test_iter_text_chunks_streams_file(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.stream_processor.text_processor.READ_SIZE', 64)
+    paragraphs = [f"Paragraph {i} has some words in it." for i in range(50)]
+    file_path = tmp_path / "book.txt"
+    file_path.write_text("\n\n".join(paragraphs), encoding='utf-8')
+
+    chunks = list(iter_text_chunks(file_path, max_chars=100))
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n\n".join(chunks) == "\n\n".join(paragraphs)
+
+def test_process_text_local_file_is_not_read_in_full(tmp_path):
+    file_path = tmp_path / "notes.txt"
+    file_path.write_text("x" * 5000, encoding='utf-8')
+
+    text_info = process_text(str(file_path), tmp_path)
+
+    assert text_info['title'] == 'notes'
+    assert text_info['content'] is None
+    assert text_info['preview'] == "x" * 1000 + "..."
+    assert "".join(iter_source_chunks(text_info)) == "x" * 5000
+
+def test_process_text_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        process_text(str(tmp_path / "missing.txt"), tmp_path)
@@ -0,0 +1,99 @@
+import multiprocessing
+import time
+import pytest
+from src.stream_processor.work_queue import WorkQueue, run_worker
+
+STAGE_ORDER = ("fetch", "compute")
+
+def fetch(payload):
+    payload['fetched'] = True
+    return payload
+
+def compute(payload):
+    payload['result'] = payload['n'] * 2
+    return payload
+
+def broken(payload):
+    raise RuntimeError("boom")
+
+HANDLERS = {"fetch": fetch, "compute": compute}
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db", lease_seconds=30)
+    yield queue
+    queue.close()
+
+def test_job_moves_through_stages(queue):
+    job_id = queue.enqueue({'n': 21}, "fetch")
+
+    processed = run_worker(queue, HANDLERS, STAGE_ORDER, worker_id="w1", exit_when_idle=True)
+
+    job = queue.job(job_id)
+    assert processed == 2
+    assert job['status'] == 'done'
+    assert job['payload'] == {'n': 21, 'fetched': True, 'result': 42}
+
+def test_worker_only_claims_its_stages(queue):
+    queue.enqueue({'n': 1}, "fetch")
+
+    assert queue.claim("compute-node", ["compute"]) is None
+    job = queue.claim("fetch-node", ["fetch"])
+    assert job['stage'] == "fetch"
+    assert queue.claim("other", ["fetch"]) is None
+
+def test_transient_keys_are_not_stored(queue):
+    job_id = queue.enqueue({'n': 1, '_audio': object()}, "fetch")
+
+    assert queue.job(job_id)['payload'] == {'n': 1}
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db", lease_seconds=0.1)
+    job_id = queue.enqueue({'n': 1}, "fetch")
+    assert queue.claim("dead-worker", ["fetch"])['id'] == job_id
+
+    time.sleep(0.2)
+    job = queue.claim("live-worker", ["fetch"])
+
+    assert job['id'] == job_id
+    assert job['attempts'] == 2
+    # The dead worker can no longer complete the job it lost
+    assert not queue.complete(job_id, "dead-worker", {'n': 1}, "compute")
+    queue.close()
+
+def test_failing_job_gives_up_after_max_attempts(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.db", max_attempts=2)
+    job_id = queue.enqueue({'n': 1}, "fetch")
+
+    run_worker(queue, {"fetch": broken}, STAGE_ORDER, worker_id="w1", exit_when_idle=True)
+
+    job = queue.job(job_id)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert 'boom' in job['error']
+    queue.close()
+
+def _worker_process(db_path, stages):
+    queue = WorkQueue(db_path, lease_seconds=5)
+    run_worker(queue, HANDLERS, STAGE_ORDER, stages=stages, exit_when_idle=True, poll_interval=0.05)
+    queue.close()
+
+def test_multiple_processes_share_the_queue(tmp_path):
+    db_path = tmp_path / "queue.db"
+    queue = WorkQueue(db_path)
+    job_ids = [queue.enqueue({'n': n}, "fetch") for n in range(30)]
+
+    workers = [
+        multiprocessing.Process(target=_worker_process, args=(db_path, ["fetch"])),
+        multiprocessing.Process(target=_worker_process, args=(db_path, ["fetch"])),
+        multiprocessing.Process(target=_worker_process, args=(db_path, ["compute"])),
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert [queue.job(job_id)['payload']['result'] for job_id in job_ids] == [n * 2 for n in range(30)]
+    assert queue.counts() == {"compute": {"done": 30}}
+    queue.close()
@@ -1,6 +1,9 @@
+import asyncio
 import pytest
+from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
-from src.stream_processor.youtube_processor import get_video_info, process_youtube, generate_rich_summary, generate_metadata
+from src.stream_processor.youtube_processor import get_video_info, generate_rich_summary, generate_metadata, audio_download_options, download_audio
 
 @pytest.fixture
 def mock_yt_dlp():
@@ -38,8 +41,22 @@ def test_get_video_info(mock_yt_dlp):
     assert result['tags'] == ['tag1', 'tag2']
     assert result['url'] == url
 
-def test_generate_rich_summary(mock_openai):
-    mock_openai.return_value.choices[0].message.content = 'Test summary'
+def test_get_video_info_is_cached(mock_yt_dlp):
+    mock_yt_dlp.return_value.extract_info.return_value = {'title': 'Cached Video', 'id': 'cached_id'}
+    url = 'https://www.youtube.com/watch?v=cached_id'
+
+    first = get_video_info(url)
+    second = get_video_info(url)
+
+    assert first == second
+    assert second['title'] == 'Cached Video'
+    mock_yt_dlp.return_value.extract_info.assert_called_once_with(url, download=False)
+
+def test_generate_rich_summary(mock_openai, tmp_path):
+    mock_openai.return_value = iter([
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))], usage=None)
+        for part in ('Test ', 'summary')
+    ])
     video_info = {
         'title': 'Test Video',
         'channel': 'Test Channel',
@@ -48,12 +65,19 @@ def test_generate_rich_summary(mock_openai):
         'like_count': 100,
         'duration': 300,
         'upload_date': '20230101',
-        'tags': ['tag1', 'tag2'],
+        'tags': ['tag1', 'tag2', 'TAG1'],
     }
+    section_file = tmp_path / 'summary.md'
+    stats = {}
 
-    result = generate_rich_summary(video_info)
+    result = asyncio.run(generate_rich_summary(video_info, 'Uma frase da transcrição.', section_file, stats))
 
     assert result == 'Test summary'
+    assert section_file.read_text(encoding='utf-8') == 'Test summary'
+    assert stats['completion_tokens'] > 0
+    prompt = mock_openai.call_args.kwargs['messages'][1]['content']
+    assert 'Tags: tag1, tag2\n' in prompt
+    assert 'Uma frase da transcrição.' in prompt
 
 def test_generate_metadata():
     video_info = {
@@ -77,4 +101,30 @@ def test_generate_metadata():
     assert result['view_count'] == 1000
     assert result['like_count'] == 100
     assert result['tags'] == ['tag1', 'tag2']
-    assert 'processing_date' in result
\ No newline at end of file
+    assert 'processing_date' in result
+
+def test_audio_download_options(tmp_path):
+    options = audio_download_options(tmp_path, 'test_id')
+
+    # Lowest adequate audio-only stream first, kept in its original container
+    assert options['format'].startswith('wa[abr>=32][asr>=16000]')
+    assert 'postprocessors' not in options
+    assert options['outtmpl'] == str(tmp_path / 'test_id.%(ext)s')
+    assert options['concurrent_fragment_downloads'] > 1
+
+def test_audio_download_options_never_fall_back_to_best_video():
+    options = audio_download_options(Path('out'))
+
+    assert options['format'].endswith('/wa/wa*/w')
+    assert '/ba' not in options['format'] and '/b/' not in options['format']
+
+def test_download_audio_returns_downloaded_file(mock_yt_dlp, tmp_path):
+    ydl = mock_yt_dlp.return_value.__enter__.return_value
+    ydl.extract_info.return_value = {'format_id': '139', 'abr': 48, 'acodec': 'mp4a.40.5', 'ext': 'm4a'}
+    ydl.prepare_filename.return_value = str(tmp_path / 'test_id.m4a')
+
+    audio_file = download_audio('https://www.youtube.com/watch?v=test_id', tmp_path, 'test_id')
+
+    assert audio_file == tmp_path / 'test_id.m4a'
+    mock_yt_dlp.assert_called_once_with(audio_download_options(tmp_path, 'test_id'))
+    ydl.extract_info.assert_called_once_with('https://www.youtube.com/watch?v=test_id', download=True)